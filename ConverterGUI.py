@@ -81,7 +81,7 @@ class mainGUI(QtGui.QMainWindow):
     
     def loadGDS(self):
         self.GDS2v3.g.__init__()
-        self.GDS2v3.readGDS(self.filepath)
+        self.GDS2v3.readGDS(self.filepath, lazy = True)
         sname = sorted(self.GDS2v3.g.structureName)
         self.lwCellName.clear()
         self.lwCellName.addItems(sname)
@@ -3,6 +3,7 @@
 import numpy as np
 from ELD_Cell import ELD_Cell
 from arrayFracture import arrayFracture
+from fracture import fracture
 
 class ELD_Canvas(object):
     '''
@@ -25,6 +26,8 @@ class ELD_Canvas(object):
         cart2img                =   Convert cartesian to image coordinates
         fracture                =   Fracture all patterns into primitives
         fieldFracture           =   Fracture all patterns into fields
+        cacheFracture           =   Fracture all patterns into fields and
+                                    primitives with shared results
         arrayFracture           =   Fracture arrays into fields
        
     Long Chang, UH, August 2013
@@ -82,9 +85,9 @@ class ELD_Canvas(object):
     def cellID(self, val):
         self._cellID.append(val)
 
-    def addCell(self, cellID):
+    def addCell(self, cellID, key = None):
         '''
-        addCell(cellID = None)
+        addCell(cellID, key = None)
         
         Adds a cell to the canvas and returns the cellID
         
@@ -92,6 +95,8 @@ class ELD_Canvas(object):
         ----------
         cellID : integer
             Adds a cell with the specified identification number to the canvas
+        key : hashable object or None
+            Identifies the source geometry of the cell
             
         Returns
         -------
@@ -102,6 +107,7 @@ class ELD_Canvas(object):
             raise ValueError('ELD_Canvas.addCell() : The specified cellID is already defined.')
         else:
             tmp = ELD_Cell(cellID)
+            tmp.key = key
             self.cell.append(tmp)
             self.cellID = cellID
     
@@ -285,11 +291,23 @@ class ELD_Canvas(object):
         ----------
         fieldSize : list of 2 integers
             Specify the width and height of each field
+            
+        Results
+        -------
+        fieldCount : 3x1 numpy.ndarray of type numpy.int64
+            Number of polygons checked, sliced and the resulting pieces, see
+            fracture.fieldCount
+            
+        Description
+        -----------
+        The bounding boxes of the polygons of each pattern are checked in one
+        pass, and only the polygons that cross a field line are sliced.
         '''
+        fieldCount = np.zeros(3,dtype=np.int64)
         for i in self.cell:
             if np.sum(i.displacement > 0) >= 1:
                 i.displacePattern()
-            i.fieldFracture(fieldSize)
+            fieldCount += i.fieldFracture(fieldSize)
 #            tmp = [i.boundary[0]/fieldSize[0], i.boundary[1]/fieldSize[1], i.boundary[4]/fieldSize[0], i.boundary[5]/fieldSize[1]]
 #            if tmp[0] == tmp[2] or tmp[1] == tmp[3]:
 #                displacement = np.array([tmp[0]*fieldSize[0]+i.displacement[0], tmp[1]*fieldSize[1]+i.displacement[1]],dtype=np.int32)
@@ -298,6 +316,74 @@ class ELD_Canvas(object):
 #                i.displacement = displacement
 #            
 #            print 'hello'
+        return fieldCount
+            
+    def cacheFracture(self, fieldSize = [200000, 200000], nWorker = 1, cache = None, diskCache = None, mode = 'manhattan', minWidth = 0):
+        '''
+        cacheFracture(fieldSize = [200000, 200000], nWorker = 1, cache = None, diskCache = None, mode = 'manhattan', minWidth = 0)
+        
+        Fractures the patterns along field boundaries and into primitives
+        
+        Parameters
+        ----------
+        fieldSize : list of 2 integers
+            Specify the width and height of each field
+        nWorker : integer
+            Number of processes used to fracture the polygons
+        cache : fractureCache or None
+            A cache shared by all polygons with the same shape
+        diskCache : fractureDiskCache or None
+            A cache of the polygons fractured in earlier conversions
+        mode : string
+            The fracture mode, see fracture.mode
+        minWidth : float
+            The sliver width of the minimum mode, see fracture.minWidth
+            
+        Results
+        -------
+        pathCount : 3x1 numpy.ndarray of type numpy.int64
+            Number of fractured polygons, rectangles and trapezoids, see
+            fracture.classify
+        fieldCount : 3x1 numpy.ndarray of type numpy.int64
+            Number of checked polygons, sliced polygons and pieces, see
+            fracture.fieldCount
+            
+        Description
+        -----------
+        Same as fieldFracture followed by fracture, but cells with the same
+        key share their fractured primitives.  A structure that is placed many
+        times is fractured once, so the time scales with the unique geometry
+        rather than the number of placements.
+        
+        The polygons of all cells are collected first and fractured in one
+        call to fracture.parallelFracture, so the result does not depend on
+        nWorker.
+        '''
+        shared = {}
+        job = []
+        plan = []
+        for i in self.cell:
+            if np.sum(i.displacement > 0) >= 1:
+                i.displacePattern()
+            for j in i.pattern:
+                if i.key is None:
+                    tmp = None
+                else:
+                    tmp = shared.setdefault((i.key, j.shotRank), [])
+                plan.append(j.planFracture(fieldSize, tmp, job))
+        A = fracture()
+        A.cache = cache
+        A.diskCache = diskCache
+        A.mode = mode
+        A.minWidth = minWidth
+        result = A.parallelFracture(job, fieldSize, nWorker)
+        k = 0
+        for i in self.cell:
+            for j in i.pattern:
+                j.applyFracture(plan[k], result)
+                k += 1
+            i.updateBoundary()
+        return A.pathCount, A.fieldCount
             
     def arrayFracture(self, fieldSize = [200000, 200000], maxArrayLength = 2000):
         '''
@@ -39,6 +39,7 @@ class ELD_Cell(object):
         self._pitchY = 0
         self._cellArray = False
         self._patternArray = False
+        self._key = None
 
     def __repr__(self):
         print 'ELD_Cell object'
@@ -147,6 +148,21 @@ class ELD_Cell(object):
     def pitchY(self, val):
         self._pitchY = int(val)
         
+    @property
+    def key(self):
+        '''
+        key : hashable object or None
+            Identifies the source geometry of the cell, for example the index
+            of a GDSII structure.  Cells with the same key contain the same
+            patterns up to a translation, so their fractured primitives can
+            be shared.
+        '''
+        return self._key
+    
+    @key.setter
+    def key(self, val):
+        self._key = val
+        
     @property
     def pattern(self):
         '''
@@ -323,10 +339,19 @@ class ELD_Cell(object):
         ----------
         fieldSize : list of 2 integers
             Specify the width and height of each field
+            
+        Results
+        -------
+        fieldCount : 3x1 numpy.ndarray of type numpy.int64
+            Number of polygons checked, sliced and the resulting pieces, see
+            fracture.fieldCount
         '''
+        fieldCount = np.zeros(3,dtype=np.int64)
         for i in self.pattern:
-            i.fieldFracture(fieldSize)
+            fieldCount += i.fieldFracture(fieldSize)
         self.updateBoundary()
+        return fieldCount
+
 
 def test():
     import matplotlib.pyplot as plot
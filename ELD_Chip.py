@@ -3,6 +3,7 @@
 import numpy as np
 from ELD_Field import ELD_Field
 from ELD_Canvas import ELD_Canvas
+from fracture import fractureCache
 
 class ELD_Chip(object):
     '''
@@ -39,6 +40,13 @@ class ELD_Chip(object):
         self._chipSize = np.zeros(2,dtype=np.int32)
         self._fieldSize = [2000000, 2000000]
         self._scale = 0
+        self._nWorker = 1
+        self._cache = fractureCache()
+        self._diskCache = None
+        self._pathCount = np.zeros(3,dtype=np.int64)
+        self._fieldCount = np.zeros(3,dtype=np.int64)
+        self._fractureMode = 'manhattan'
+        self._minWidth = 0
 
     def __repr__(self):
         print 'ELD_Chip object'
@@ -120,6 +128,94 @@ class ELD_Chip(object):
     @scale.setter
     def scale(self, val):
         self._scale = val
+        
+    @property
+    def nWorker(self):
+        '''
+        nWorker : integer
+            Number of processes used to fracture the patterns
+        '''
+        return self._nWorker
+        
+    @nWorker.setter
+    def nWorker(self, val):
+        if int(val) < 1:
+            raise ValueError('ELD_Chip.nWorker : This parameter must be a positive integer')
+        self._nWorker = int(val)
+        
+    @property
+    def cache(self):
+        '''
+        cache : fractureCache or None
+            The cache of fractured polygons, which holds the hit and miss
+            statistics of the last fracture.  The entries are kept from one
+            fracture to the next, see fracture.parallelFracture for nWorker
+            None    :   Every polygon is fractured
+        '''
+        return self._cache
+        
+    @cache.setter
+    def cache(self, val):
+        self._cache = val
+        
+    @property
+    def diskCache(self):
+        '''
+        diskCache : fractureDiskCache or None
+            The cache of fractured polygons stored in a directory and shared
+            by all conversions, which holds the hit and miss statistics of
+            the last fracture
+            None    :   The disk is not used
+        '''
+        return self._diskCache
+        
+    @diskCache.setter
+    def diskCache(self, val):
+        self._diskCache = val
+        
+    @property
+    def pathCount(self):
+        '''
+        pathCount : 3x1 numpy.ndarray of type numpy.int64
+            Number of polygons of the last fracture that were fractured, or
+            passed as rectangles or trapezoids, see fracture.classify
+        '''
+        return self._pathCount
+        
+    @property
+    def fieldCount(self):
+        '''
+        fieldCount : 3x1 numpy.ndarray of type numpy.int64
+            Number of polygons of the last fracture that were checked against
+            the field lines, sliced, and the number of pieces, see
+            fracture.fieldCount
+        '''
+        return self._fieldCount
+        
+    @property
+    def fractureMode(self):
+        '''
+        fractureMode : string
+            The fracture mode, see fracture.mode
+        '''
+        return self._fractureMode
+        
+    @fractureMode.setter
+    def fractureMode(self, val):
+        self._fractureMode = val
+        
+    @property
+    def minWidth(self):
+        '''
+        minWidth : float
+            Primitives narrower than minWidth are avoided in the minimum
+            fracture mode, see fracture.minWidth
+        '''
+        return self._minWidth
+        
+    @minWidth.setter
+    def minWidth(self, val):
+        self._minWidth = val
 
     def addField(self, fieldID):
         '''
@@ -140,9 +236,9 @@ class ELD_Chip(object):
             self.field.append(tmp)
             self.fieldID = fieldID
 
-    def addCell(self, cellID = None):
+    def addCell(self, cellID = None, key = None):
         '''
-        addCell(cellID = None)
+        addCell(cellID = None, key = None)
         
         Adds a cell to the canvas and returns the cellID
         
@@ -151,6 +247,10 @@ class ELD_Chip(object):
         cellID : integer or None
             Adds a cell with the specified identification number to the canvas
             None    :   Automatically assign a unique identification number
+        key : hashable object or None
+            Identifies the source geometry of the cell, for example the index
+            of a GDSII structure.  Cells with the same key are fractured once
+            and the primitives are placed with the cell displacement.
             
         Returns
         -------
@@ -163,7 +263,7 @@ class ELD_Chip(object):
             except:
                 cellID = 0
                 
-        self.canvas.addCell(cellID)
+        self.canvas.addCell(cellID, key)
         
         return self.canvas.cellID[-1]
     
@@ -358,11 +458,52 @@ class ELD_Chip(object):
             self.canvas.scalePattern(self.scale)
         self.canvas.cart2img()
         self.canvas.arrayFracture(self.fieldSize)
-        self.canvas.fieldFracture(self.fieldSize)
-        self.canvas.fracture()
+        for i in [self.cache, self.diskCache]:
+            if not i is None:
+                i.hit = 0
+                i.miss = 0
+        self._pathCount, self._fieldCount = self.canvas.cacheFracture(self.fieldSize, self.nWorker, self.cache, self.diskCache, self.fractureMode, self.minWidth)
         self.canvas.updateBoundary()
         self.chipSize = self.canvas.boundary[2:4]
         self.canvas2field()
 
+def benchmark(nCell = 200, nTile = 20):
+    '''
+    benchmark(nCell = 200, nTile = 20)
+    
+    Fractures nCell placements of the same cell with and without a cell key
+    
+    Parameters
+    ----------
+    nCell : integer
+        Number of placements
+    nTile : integer
+        Number of placements along X
+    '''
+    import time
+    xy = [[0,0,2,5,2,7,0,10,5,10,10,15,17,8,20,10,25,5,26,5,30,10,35,10,34,8,36,5,33,0,22,0,17,5,9,5,6,0,0,0],
+          [40,1249,905,1249,943,751,941,751,40,1249],
+          [10,20,25,23,27,23,43,20,10,20]]
+    t = np.linspace(0,2*np.pi,65)[:-1]
+    xy.append(np.int32(np.round(np.ravel(np.column_stack((500+300*np.cos(t),600+300*np.sin(t)))))).tolist())
+    result = []
+    print 'Key     Placements   Primitives   fracture [s]'
+    for key in [None, 0]:
+        a = ELD_Chip()
+        for i in range(nCell):
+            cellID = a.addCell(key = key)
+            for j in range(len(xy)):
+                a.addPattern(cellID, xy[j], j)
+            a.offsetCellDisplacement(cellID, np.array([1000*(i%nTile), 1500*(i/nTile)],dtype=np.int32))
+        a.setScale(1)
+        a.setFieldSize([6000,6000])
+        t0 = time.time()
+        a.fracture()
+        t1 = time.time()
+        tmp = [k for f in a.field for c in f.cell for p in c.pattern for k in p.xy]
+        result.append(tmp)
+        print '%-6s  %10d   %10d   %12.3f' % (key, nCell, len(tmp), t1-t0)
+    print 'Identical primitives : ' , len(result[0]) == len(result[1]) and all([np.array_equal(i,j) for i,j in zip(result[0],result[1])])
+
 if __name__ == '__main__':
     print 'No test defined'
@@ -20,6 +20,8 @@ class ELD_Pattern(object):
         addPattern              =   Adds a pattern to a cell
         setCellArray            =   Sets the cell array parameters
         fracture                =   Fracture all patterns into primitives
+        planFracture            =   Plan the fracturing with shared results
+        applyFracture           =   Replace polygons by their primitives
        
     Long Chang, UH, August 2013
     '''
@@ -182,9 +184,90 @@ class ELD_Pattern(object):
         ----------
         fieldSize : list of 2 integers
             Specify the width and height of each field
+            
+        Results
+        -------
+        fieldCount : 3x1 numpy.ndarray of type numpy.int64
+            Number of polygons checked, sliced and the resulting pieces, see
+            fracture.fieldCount
         '''
-        tmp = fracture().fieldFracture(self.xy, fieldSize)
+        A = fracture()
+        tmp = A.fieldFracture(self.xy, fieldSize)
         self.xy = [i.astype(np.int32) for i in tmp]
+        return A.fieldCount
+        
+    def planFracture(self, fieldSize, cache, job):
+        '''
+        planFracture(fieldSize, cache, job)
+        
+        Plans the field fracturing and fracturing of all polygons
+        
+        Parameters
+        ----------
+        fieldSize : list of 2 integers
+            Specify the width and height of each field
+        cache : list or None
+            One entry for each polygon, shared by all patterns with the same
+            source geometry.  An entry is None or a tuple of the polygon and
+            the index of its job
+            None    :   Every polygon is fractured
+        job : list of Nx1 numpy.ndarray
+            The polygons to be fractured.  Polygons are appended to it.
+            
+        Results
+        -------
+        plan : list of tuples
+            (index, dxy) for each polygon.  The primitives are the result of
+            job[index] translated by dxy, or not translated if dxy is None
+            
+        Description
+        -----------
+        Slicing and fracturing do not depend on the position of a polygon
+        that lies inside a single field, so such a polygon is fractured only
+        once.  Later polygons that are equal to the cached polygon up to a
+        translation reuse its job with the same translation.  Polygons that
+        touch a field line are always fractured.
+        '''
+        if not cache is None and len(cache) < len(self.xy):
+            cache.extend([None]*(len(self.xy)-len(cache)))
+        if not cache is None:
+            cross = fracture().fieldCross(self.xy, fieldSize)
+        plan = []
+        for i in range(len(self.xy)):
+            xy = self.xy[i]
+            if not cache is None:
+                inField = not cross[i]
+                if inField and cache[i] is None:
+                    cache[i] = (xy.copy(), len(job))
+                elif inField and cache[i][0].size == xy.size:
+                    dxy = xy[0:2] - cache[i][0][0:2]
+                    if np.all(xy - cache[i][0] == np.tile(dxy,xy.size/2)):
+                        plan.append((cache[i][1], dxy))
+                        continue
+            plan.append((len(job), None))
+            job.append(xy)
+        return plan
+        
+    def applyFracture(self, plan, result):
+        '''
+        applyFracture(plan, result)
+        
+        Replaces the polygons by their primitives
+        
+        Parameters
+        ----------
+        plan : list of tuples
+            The result of planFracture
+        result : list of list of Nx1 numpy.ndarray of type numpy.int32
+            The primitives of each job
+        '''
+        parts = []
+        for index, dxy in plan:
+            if dxy is None:
+                parts.extend(result[index])
+            else:
+                parts.extend([k + np.tile(dxy,k.size/2) for k in result[index]])
+        self.xy = parts
         
     def lineFracture(self, position, horizontal=True):
         '''
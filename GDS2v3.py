@@ -118,9 +118,9 @@ class GDS2v3(object):
         else:
             raise ValueError('GDS2v3.setMode() : The mode parameter must be in the set [2,4]')    
     
-    def readGDS(self, filename):
+    def readGDS(self, filename, lazy = False):
         '''
-        readGDS(filename)
+        readGDS(filename, lazy = False)
         
         Reads a GDS file and populate the GDS layout
         
@@ -128,12 +128,16 @@ class GDS2v3(object):
         ----------
         filename : string
             Name of gds file to be read
+        lazy : boolean
+            If True, only the structure names are read and each structure is
+            parsed when it is first accessed
         '''
         if filename[-4:].lower() == '.gds':
             self.filename = filename[:-4]
         else:
             self.filename = filename
-        self.g.readFile(self.filename)
+        self.g.columnar = True
+        self.g.readFile(self.filename, lazy)
         
     def selectCell(self, cellName = 'main'):
         '''
@@ -152,7 +156,7 @@ class GDS2v3(object):
             self.hierarchyList, self.hierarchyIndex, self.hierarchyRepeat = self.g.genHierarchyTree(cellName)
         except:
             self.hierarchyList = None
-            self.hierarchyIndex = self.g.structureName.index(cellName)
+            self.hierarchyIndex = self.g.structureIndex(cellName)
                 
     def convGDS2ELD(self):
         '''
@@ -166,14 +170,14 @@ class GDS2v3(object):
         code may fail to work with other GDS files or when KLayout is fixed.
         '''
         if self.hierarchyList is None:
-            cellID = self.c.addCell()
+            cellID = self.c.addCell(key = self.hierarchyIndex)
             for i in self.g.structure[self.hierarchyIndex].boundary:
                 self.c.addPattern(cellID,copy.copy(i.xy),i.datatype)
         else:
             for i in range(len(self.hierarchyList)):
                 branch = self.hierarchyList[i]
                 for j in range(self.hierarchyRepeat[i]):
-                    cellID = self.c.addCell()
+                    cellID = self.c.addCell(key = branch[-1])
                     #Add patterns
                     for k in self.g.structure[branch[-1]].boundary:
                         self.c.addPattern(cellID,copy.copy(k.xy),k.datatype)
@@ -5,6 +5,7 @@ import copy
 from v3_Director import v3_Director
 from GDSII_Library import GDSII_Library
 from ELD_Chip import ELD_Chip
+from fracture import fractureDiskCache
 
 class GDS2v3(object):
     
@@ -119,9 +120,9 @@ class GDS2v3(object):
         else:
             raise ValueError('GDS2v3.setMode() : The mode parameter must be in the set [2,4]')    
     
-    def readGDS(self, filename):
+    def readGDS(self, filename, lazy = False):
         '''
-        readGDS(filename)
+        readGDS(filename, lazy = False)
         
         Reads a GDS file and populate the GDS layout
         
@@ -129,12 +130,16 @@ class GDS2v3(object):
         ----------
         filename : string
             Name of gds file to be read
+        lazy : boolean
+            If True, only the structure names are read and each structure is
+            parsed when it is first accessed
         '''
         if filename[-4:].lower() == '.gds':
             self.filename = filename[:-4]
         else:
             self.filename = filename
-        self.g.readFile(self.filename)
+        self.g.columnar = True
+        self.g.readFile(self.filename, lazy)
         
     def selectCell(self, cellName = 'main'):
         '''
@@ -153,7 +158,7 @@ class GDS2v3(object):
             self.hierarchyList, self.hierarchyIndex, self.hierarchyRepeat = self.g.genHierarchyTree(cellName)
         except:
             self.hierarchyList = None
-            self.hierarchyIndex = self.g.structureName.index(cellName)
+            self.hierarchyIndex = self.g.structureIndex(cellName)
                 
     def convGDS2ELD(self):
         '''
@@ -167,14 +172,14 @@ class GDS2v3(object):
         code may fail to work with other GDS files or when KLayout is fixed.
         '''
         if self.hierarchyList is None:
-            cellID = self.c.addCell()
+            cellID = self.c.addCell(key = self.hierarchyIndex)
             for i in self.g.structure[self.hierarchyIndex].boundary:
                 self.c.addPattern(cellID,copy.copy(i.xy),i.datatype)
         else:
             for i in range(len(self.hierarchyList)):
                 branch = self.hierarchyList[i]
                 for j in range(self.hierarchyRepeat[i]):
-                    cellID = self.c.addCell()
+                    cellID = self.c.addCell(key = branch[-1])
                     #Add patterns
                     for k in self.g.structure[branch[-1]].boundary:
                         self.c.addPattern(cellID,copy.copy(k.xy),k.datatype)
@@ -215,8 +220,11 @@ class GDS2v3(object):
                         self.v.addPattern(fieldID, [l[:-2] for l in k.xy], k.shotRank, j.pitchX, j.pitchY, j.nX, j.nY)
                     except:
                         pass
-    def writev3(self):
-        self.v.writeFile(self.filename)
+    def writev3(self, stream = False):
+        if stream:
+            self.v.streamFile(self.filename)
+        else:
+            self.v.writeFile(self.filename)
         
     def plotELD(self):
         import matplotlib.pyplot as plot
@@ -229,6 +237,32 @@ class GDS2v3(object):
         plot.show()
         
 def convert(argv):
+    '''
+    convert(argv)
+    
+    Converts a GDSII file to a Jeol v3.0 file
+    
+    Parameters
+    ----------
+    argv : list of strings
+        [filename, mode, cellname] followed by the options
+            --workers N :   Fracture the patterns with N processes, each
+                            chunk of 64 polygons starts with an empty
+                            fracture cache, see fracture.parallelFracture
+            --cache DIR :   Store the fractured patterns in the directory DIR
+                            and reuse them in later conversions
+            --fracture MODE :
+                            Fracture mode, see fracture.mode
+            --minwidth W :  Sliver width of the minimum fracture mode in
+                            pattern units, see fracture.minWidth
+            --packing exact :
+                            Fill each text record exactly, see
+                            v3_Director.exactPacking
+            --validate :    Parse the written file and check its records,
+                            see v3_Director.validateFile
+            --stream :      Write each field to the file as it is generated,
+                            see v3_Director.streamFile
+    '''
     import time
     start = time.time()
     filename = argv[0]
@@ -237,17 +271,59 @@ def convert(argv):
     else:
         print 'Error_Input: The second argument should be 2 or 4'
     cellname = argv[2]
+    nWorker = 1
+    cacheDirectory = None
+    fractureMode = None
+    minWidth = 0
+    exactPacking = False
+    validate = False
+    stream = False
+    option = argv[3:]
+    while len(option) > 0:
+        if option[0] == '--workers' and len(option) > 1 and option[1].isdigit() and int(option[1]) > 0:
+            nWorker = int(option[1])
+            option = option[2:]
+        elif option[0] == '--cache' and len(option) > 1:
+            cacheDirectory = option[1]
+            option = option[2:]
+        elif option[0] == '--fracture' and len(option) > 1:
+            fractureMode = option[1]
+            option = option[2:]
+        elif option[0] == '--minwidth' and len(option) > 1 and option[1].isdigit():
+            minWidth = int(option[1])
+            option = option[2:]
+        elif option[0] == '--packing' and len(option) > 1 and option[1] in ['sMax', 'exact']:
+            exactPacking = option[1] == 'exact'
+            option = option[2:]
+        elif option[0] == '--validate':
+            validate = True
+            option = option[1:]
+        elif option[0] == '--stream':
+            stream = True
+            option = option[1:]
+        else:
+            print 'Error_Input: Unknown option ' + option[0]
+            option = option[1:]
 
     z = GDS2v3()
     z.setMode(mode)
-    z.readGDS(filename)
+    z.c.nWorker = nWorker
+    if not cacheDirectory is None:
+        z.c.diskCache = fractureDiskCache(cacheDirectory)
+    if not fractureMode is None:
+        z.c.fractureMode = fractureMode
+    z.c.minWidth = minWidth
+    z.v.exactPacking = exactPacking
+    z.readGDS(filename, lazy = True)
     try:
     	z.selectCell(cellname)
     except ValueError:
     	print 'Error_Input: The specified cell does not exist'
     z.convGDS2ELD()
     z.convELD2v3()
-    z.writev3()
+    z.writev3(stream)
+    if validate:
+        z.v.validateFile(z.filename)
 
     end = time.time()
     print int(end-start)
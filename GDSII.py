@@ -2,6 +2,7 @@
 
 import numpy as np
 import math
+import struct
 
 class GDSII(object):
     '''
@@ -358,8 +359,268 @@ class GDSII(object):
             dec = -dec
         return dec
 
+    def dec2fbinArray(self, val):
+        '''
+        dec2fbinArray(val)
+        
+        Returns the excess 64 floating point binary of an array of decimal
+        values
+        
+        Parameters
+        ----------
+        val : signed float or array_like of signed floats
+            The floating point numbers to be converted
+        
+        Results
+        -------
+        fbin : numpy.ndarray of type numpy.uint8
+            An Nx8 array where each row has the form [SE M M M M M M M] and 
+            represents a floating point number in excess 64 notation
+        
+        Description
+        -----------
+        This is the batched counterpart of dec2fbin.  Each number is split by
+        numpy.frexp into a 53 bit mantissa and a base 2 exponent.  The base 2
+        exponent is rounded up to a base 16 exponent and the mantissa is
+        shifted into the 56 bit field, so the conversion is exact.  The
+        sign, exponent and mantissa are assembled with integer arithmetic on
+        numpy.uint64 and written as big-endian bytes.
+        '''
+        val = np.array(val,dtype=np.float64,ndmin=1).ravel()
+        m, e = np.frexp(np.abs(val))
+        E = (e + 3)//4
+        if any((E[val != 0] < -64) | (E[val != 0] > 63)):
+            raise ValueError('GDSII.dec2fbinArray() : The val parameter must be between 16^-65 and 16^63')
+        M = np.uint64(m*2**53) << np.uint64(3 + e - 4*E)
+        fbin = (np.uint64(val < 0) << np.uint64(63)) | (np.uint64(E + 64) << np.uint64(56)) | M
+        fbin[val == 0] = 0
+        return fbin.astype('>u8').view(np.uint8).reshape(-1,8)
+        
+    def fbin2decArray(self, val):
+        '''
+        fbin2decArray(val)
+        
+        Returns the decimal values of an array of excess 64 floating point
+        binaries
+        
+        Parameters
+        ----------
+        val : numpy.ndarray of type numpy.uint8
+            An Nx8 array or an array of 8N elements where every 8 bytes have
+            the form [SE M M M M M M M]
+                
+        Results
+        -------
+        dec : numpy.ndarray of type numpy.float64
+            Decimal values
+        '''
+        fbin = np.ascontiguousarray(val,dtype=np.uint8).ravel().view('>u8').astype(np.uint64)
+        E = ((fbin >> np.uint64(56)) & np.uint64(0x7F)).astype(np.int64) - 64
+        M = (fbin & np.uint64(2**56-1)).astype(np.float64)
+        dec = np.ldexp(M, 4*E - 56)
+        dec[(fbin >> np.uint64(63)) == 1] *= -1
+        return dec
+
+    def indexRecord(self, record):
+        '''
+        indexRecord(record)
+        
+        Walks the record headers once and returns the position of every record
+        
+        Parameters
+        ----------
+        record : numpy.ndarray of type numpy.uint8
+            The binary pattern data
+            
+        Results
+        -------
+        offset : numpy.ndarray of type numpy.int64
+            The position of each record in the binary pattern data
+        length : numpy.ndarray of type numpy.int64
+            The length of each record including the 4 byte header
+        opCode : numpy.ndarray of type numpy.int64
+            The command code of each record
+            
+        Description
+        -----------
+        Only the 4 byte headers are visited, the payloads are skipped.  The
+        walk stops at the end of the data or at the zero padding that may
+        follow the library end record.
+        '''
+        unpack = struct.Struct('>HH').unpack_from
+        buf = buffer(record)
+        size = record.size
+        offset = []
+        length = []
+        opCode = []
+        p = 0
+        while p + 4 <= size:
+            l, c = unpack(buf, p)
+            if l < 4:
+                break
+            offset.append(p)
+            length.append(l)
+            opCode.append(c)
+            p += l
+        return np.array(offset,dtype=np.int64), np.array(length,dtype=np.int64), np.array(opCode,dtype=np.int64)
+        
+    def decodeIndex(self, record, offset, length, opCode):
+        '''
+        decodeIndex(record, offset, length, opCode)
+        
+        Decodes the payload of all indexed records at once
+        
+        Parameters
+        ----------
+        record : numpy.ndarray of type numpy.uint8
+            The binary pattern data
+        offset, length, opCode : numpy.ndarray
+            The record index from the indexRecord method
+            
+        Results
+        -------
+        value : numpy.ndarray of type numpy.int64
+            The first 2 byte unsigned integer of each record payload
+            The value is meaningless for records without a payload
+        data : dictionary of numpy.ndarray keyed by the record number
+            The decoded coordinates of each XY record as numpy.int32 and the
+            decoded values of each 8 byte real record (UNITS, MAG, ANGLE) as
+            numpy.float64
+        '''
+        #Leading 2 byte value of each record
+        p = np.minimum(offset+4, max(record.size-2,0))
+        value = record[p].astype(np.int64)*256 + record[p+1]
+        
+        data = {}
+        #XY records as 4 byte integers
+        k = np.flatnonzero(opCode == 0x1003)
+        if k.size > 0:
+            tmp = self.gatherPayload(record, offset[k]+4, length[k]-4)
+            tmp = tmp.view('>i4').astype(np.int32)
+            data.update(zip(k.tolist(),np.split(tmp,np.cumsum((length[k]-4)/4)[:-1])))
+        #8 byte real records
+        k = np.flatnonzero(opCode % 256 == 5)
+        if k.size > 0:
+            tmp = self.fbin2decArray(self.gatherPayload(record, offset[k]+4, length[k]-4))
+            data.update(zip(k.tolist(),np.split(tmp,np.cumsum((length[k]-4)/8)[:-1])))
+        return value, data
+        
+    def gatherPayload(self, record, start, nByte):
+        '''
+        gatherPayload(record, start, nByte)
+        
+        Returns the concatenated payloads of several records
+        
+        Parameters
+        ----------
+        record : numpy.ndarray of type numpy.uint8
+            The binary pattern data
+        start : numpy.ndarray of integers
+            The position of the first payload byte of each record
+        nByte : numpy.ndarray of integers
+            The payload length of each record
+            
+        Results
+        -------
+        payload : numpy.ndarray of type numpy.uint8
+            The payloads in order as one contiguous array
+        '''
+        start = start[nByte > 0]
+        stop = start + nByte[nByte > 0]
+        mask = np.zeros(record.size+1,dtype=np.int8)
+        mask[start] = 1
+        mask[stop] = -1
+        mask = np.cumsum(mask[:-1],dtype=np.int8) > 0
+        return np.ascontiguousarray(record[mask])
+
+    def stringSize(self, val):
+        '''
+        stringSize(val)
+        
+        Returns the number of bytes of a string record
+        
+        Parameters
+        ----------
+        val : string
+            The string to be encoded, padded to an even length
+        '''
+        return len(val) + len(val)%2 + 4
+        
+    def fillString(self, record, pointer, opCode, val):
+        '''
+        fillString(record, pointer, opCode, val)
+        
+        Writes a string record into a preallocated record
+        
+        Parameters
+        ----------
+        record : numpy.ndarray of type numpy.uint8
+            A preallocated record
+        pointer : integer
+            Position of the first byte of the string record
+        opCode : integer
+            Command code of the string record
+        val : string
+            The string, a null character is appended if the length is odd
+            
+        Results
+        -------
+        pointer : integer
+            Position following the string record
+        '''
+        nByte = self.stringSize(val)
+        struct.pack_into('>2H%ds' % (nByte-4), record, pointer, nByte, opCode, val)
+        return pointer + nByte
+        
+    def fillReal(self, record, pointer, opCode, val):
+        '''
+        fillReal(record, pointer, opCode, val)
+        
+        Writes an 8 byte real record into a preallocated record
+        
+        Parameters
+        ----------
+        record : numpy.ndarray of type numpy.uint8
+            A preallocated record
+        pointer : integer
+            Position of the first byte of the real record
+        opCode : integer
+            Command code of the real record
+        val : float or list of floats
+            The values to be encoded in excess 64 notation
+            
+        Results
+        -------
+        pointer : integer
+            Position following the real record
+        '''
+        fbin = self.dec2fbinArray(val).ravel()
+        struct.pack_into('>2H', record, pointer, fbin.size+4, opCode)
+        record[pointer+4:pointer+4+fbin.size] = fbin
+        return pointer + 4 + fbin.size
+
+    def recordSize(self):
+        raise ValueError('GDSII.recordSize() : All subclass must implement the recordSize method.')
+        
+    def fillRecord(self, record, pointer):
+        raise ValueError('GDSII.fillRecord() : All subclass must implement the fillRecord method.')
+
     def genRecord(self):
-        raise ValueError('GDSII.genRecord() : All subclass must implement the genRecord method.')
+        '''
+        genRecord()
+        
+        Generates the record binary
+        
+        Description
+        -----------
+        The record is generated in two passes.  The exact size of the binary
+        is computed by recordSize, a single buffer is allocated, and the
+        binary is written in place by fillRecord.
+        '''
+        self._record = np.zeros(self.recordSize(),dtype=np.uint8)
+        self._recordIndex = self.fillRecord(self._record, 0)
+        if not self._recordIndex == self._record.size:
+            raise ValueError('GDSII.genRecord() : The generated binary does not match the record size')
     
     def readRecord(self):
         raise ValueError('GDSII.readRecord() : All subclass must implement the genRecord method.')
@@ -369,6 +630,33 @@ def test():
     print 'The byte2dec(dec2byte(1000000,4)) is :\t' + str(a.byte2dec(a.dec2byte(1000000,4)))
     print 'The fbin2dec(dec2fbin(0.001)) is :\t' + str(a.fbin2dec(a.dec2fbin(.001)))
     
+    
+def testReal(n = 1000):
+    '''
+    testReal(n = 1000)
+    
+    Round trip checks of the batched excess 64 codec against the scalar
+    dec2fbin and fbin2dec methods using n random numbers.  The exponents are
+    limited to the range where the integer power in fbin2dec does not
+    overflow.
+    '''
+    a = GDSII()
+    val = np.random.uniform(0.5,1,n)*16.0**np.random.randint(-14,14,n)
+    val = np.append(val,[0.0,1e-9,1e-3,0.5,1.0,90.0,1000.0])
+    
+    #Batched round trip must be exact
+    fbin = a.dec2fbinArray(val)
+    assert all(a.fbin2decArray(fbin) == val)
+    assert all(a.fbin2decArray(a.dec2fbinArray(-val)) == -val)
+    
+    #Batched decoder against the scalar decoder
+    for i in np.flatnonzero(val):
+        assert np.allclose(a.fbin2decArray(fbin[i])[0],a.fbin2dec(fbin[i]),rtol=1e-14,atol=0)
+        
+    #Batched decoder against the scalar encoder within its 24 nibble fraction
+    for i in val[(val > 16.0**-8) & (val < 2**56)]:
+        assert np.allclose(a.fbin2decArray(a.dec2fbin(i))[0],i,rtol=1e-14,atol=0)
+    print 'testReal() : ' + str(val.size) + ' values passed'
 
 if __name__ == '__main__':
     test()
@@ -1,6 +1,7 @@
 #!/usr/bin/env ipython
 
 import numpy as np
+import struct
 from GDSII import GDSII
 
 class GDSII_Boundary(GDSII):
@@ -166,11 +167,31 @@ class GDSII_Boundary(GDSII):
     def cPLEX(self):
         return self._cPLEX
 
-    def genRecord(self):
+    def recordSize(self):
         '''
-        genRecord()
+        recordSize()
         
-        Generates the boundary element binary
+        Returns the number of bytes of the boundary element binary
+        '''
+        return 24 + self.xy.size*4
+        
+    def fillRecord(self, record, pointer):
+        '''
+        fillRecord(record, pointer)
+        
+        Writes the boundary element binary into a preallocated record
+        
+        Parameters
+        ----------
+        record : numpy.ndarray of type numpy.uint8
+            A preallocated record with at least recordSize() bytes from pointer
+        pointer : integer
+            Position of the first byte of the element in the record
+            
+        Results
+        -------
+        pointer : integer
+            Position following the last byte of the element
         
         Description
         -----------
@@ -182,33 +203,13 @@ class GDSII_Boundary(GDSII):
             Datatype
             XY
         '''
-        self.recordClear()
-        
-        #Boundary start
-        self.record = self.dec2byte(4)
-        self.record = self.dec2byte(self.cBoundary)
-        
-        #Define Layer
-        self.record = self.dec2byte(6)
-        self.record = self.dec2byte(self.cLayer)
-        self.record = self.dec2byte(self.layer)
-        
-        #Define datatype
-        self.record = self.dec2byte(6)
-        self.record = self.dec2byte(self.cDatatype)
-        self.record = self.dec2byte(self.datatype)
-
-        #Define xy    
-        self.record = self.dec2byte(self.xy.size*4+4)
-        self.record = self.dec2byte(self.cXY)
-        for i in self.xy:
-            self.record = self.dec2byte(i,4)
-            
-        #Element end
-        self.record = self.dec2byte(4)
-        self.record = self.dec2byte(self.cEnd)
-        
-        self.recordClip()
+        nByte = self.xy.size*4
+        struct.pack_into('>10H', record, pointer, 4, self.cBoundary, 6, self.cLayer, self.layer, 6, self.cDatatype, self.datatype, nByte+4, self.cXY)
+        pointer += 20
+        record[pointer:pointer+nByte] = self.xy.astype('>i4').view(np.uint8)
+        pointer += nByte
+        struct.pack_into('>2H', record, pointer, 4, self.cEnd)
+        return pointer + 4
             
     def readRecord(self, record):
         '''
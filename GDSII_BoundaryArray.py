@@ -0,0 +1,376 @@
+#!/usr/bin/env ipython
+
+import numpy as np
+import time
+from GDSII import GDSII
+from GDSII_Boundary import GDSII_Boundary
+
+class GDSII_BoundaryArray(GDSII):
+    '''
+    GDSII_BoundaryArray class : subclass of GDSII
+
+    GDSII Stream file format release 6.0
+    Columnar storage of boundary elements
+
+    A structure with hundreds of thousands of polygons carries a
+    GDSII_Boundary object with its own property machinery and a small int32
+    array for every polygon.  This class stores all boundary elements of a
+    structure in four arrays instead:
+       xy          =   The vertices of all polygons concatenated
+       offset      =   The start of each polygon in xy, with a final entry
+                       for the end of the last polygon
+       layer       =   The layer number of each polygon
+       datatype    =   The datatype number of each polygon
+
+    The class behaves like the list of GDSII_Boundary objects it replaces.
+    Indexing and iterating return GDSII_BoundaryView objects that expose
+    layer, datatype and xy, where xy is a view into the concatenated array.
+
+    The functions of this class are:
+       append           =   Adds a boundary element
+       extend           =   Adds many boundary elements at once
+       toList           =   Returns a list of GDSII_Boundary objects
+       recordSize       =   Returns the size of the record binary
+       fillRecord       =   Writes the record binary
+    '''
+
+    def __init__(self, boundary = []):
+        super(GDSII_BoundaryArray,self).__init__()
+        self._n = 0
+        self._nXY = 0
+        self._xy = np.zeros(0,dtype=np.int32)
+        self._offset = np.zeros(1,dtype=np.int64)
+        self._layer = np.zeros(0,dtype=np.int32)
+        self._datatype = np.zeros(0,dtype=np.int32)
+
+        self._cBoundary = 0x0800    #Boundary element begin
+        self._cLayer    = 0x0D02    #Layer property
+        self._cDatatype = 0x0E02    #Datatype property
+        self._cXY       = 0x1003    #XY property
+        self._cEnd      = 0x1100    #Element end
+
+        if len(boundary) > 0:
+            self.extend([i.xy for i in boundary], [i.layer for i in boundary], [i.datatype for i in boundary])
+
+    def __repr__(self):
+        print 'Boundary array'
+        print 'boundary:          ' , self._n
+        print 'vertices:          ' , self._nXY/2
+        return ''
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [GDSII_BoundaryView(self, i) for i in range(*index.indices(self._n))]
+        if index < 0:
+            index += self._n
+        if index < 0 or index >= self._n:
+            raise IndexError('GDSII_BoundaryArray : The index is out of range')
+        return GDSII_BoundaryView(self, index)
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield GDSII_BoundaryView(self, i)
+
+    @property
+    def xy(self):
+        '''
+        xy : numpy.ndarray of type numpy.int32
+            The vertices of all polygons concatenated in the form
+            [x1 y1 x2 y2 ... xn yn x1 y1 x1 y1 ...]
+        '''
+        return self._xy[:self._nXY]
+
+    @property
+    def offset(self):
+        '''
+        offset : numpy.ndarray of type numpy.int64
+            Polygon i occupies xy[offset[i]:offset[i+1]]
+        '''
+        return self._offset[:self._n+1]
+
+    @property
+    def layer(self):
+        '''
+        layer : numpy.ndarray of type numpy.int32
+            The layer number of each polygon
+        '''
+        return self._layer[:self._n]
+
+    @property
+    def datatype(self):
+        '''
+        datatype : numpy.ndarray of type numpy.int32
+            The datatype number of each polygon
+        '''
+        return self._datatype[:self._n]
+
+    def reserve(self, n, nXY):
+        '''
+        reserve(n, nXY)
+
+        Grows the arrays by doubling so that they hold at least n polygons
+        and nXY coordinates
+        '''
+        if n > self._layer.size:
+            size = max(n, 2*self._layer.size)
+            self._layer = np.append(self._layer[:self._n],np.zeros(size-self._n,dtype=np.int32))
+            self._datatype = np.append(self._datatype[:self._n],np.zeros(size-self._n,dtype=np.int32))
+            self._offset = np.append(self._offset[:self._n+1],np.zeros(size-self._n,dtype=np.int64))
+        if nXY > self._xy.size:
+            size = max(nXY, 2*self._xy.size)
+            self._xy = np.append(self._xy[:self._nXY],np.zeros(size-self._nXY,dtype=np.int32))
+
+    def append(self, val):
+        '''
+        append(val)
+
+        Adds a boundary element
+
+        Parameters
+        ----------
+        val : GDSII_Boundary or GDSII_BoundaryView
+            The boundary element
+        '''
+        xy = val.xy
+        self.reserve(self._n+1, self._nXY+xy.size)
+        self._xy[self._nXY:self._nXY+xy.size] = xy
+        self._layer[self._n] = val.layer
+        self._datatype[self._n] = val.datatype
+        self._nXY += xy.size
+        self._n += 1
+        self._offset[self._n] = self._nXY
+
+    def extend(self, xy, layer, datatype):
+        '''
+        extend(xy, layer, datatype)
+
+        Adds many boundary elements at once
+
+        Parameters
+        ----------
+        xy : list of numpy.ndarray of type numpy.int32
+            The vertices of each polygon in the form [x1 y1 ... xn yn x1 y1]
+            Polygons that are not closed are closed
+        layer : list of integers
+            The layer number of each polygon
+        datatype : list of integers
+            The datatype number of each polygon
+        '''
+        if len(xy) == 0:
+            return
+        xy = [i if i[0] == i[-2] and i[1] == i[-1] else np.append(i,i[0:2]) for i in xy]
+        size = np.cumsum([i.size for i in xy])
+        self.reserve(self._n+len(xy), self._nXY+size[-1])
+        self._xy[self._nXY:self._nXY+size[-1]] = np.concatenate(xy)
+        self._layer[self._n:self._n+len(xy)] = layer
+        self._datatype[self._n:self._n+len(xy)] = datatype
+        self._offset[self._n+1:self._n+len(xy)+1] = self._nXY + size
+        self._nXY += size[-1]
+        self._n += len(xy)
+
+    def setXY(self, index, val):
+        '''
+        setXY(index, val)
+
+        Replaces the vertices of a polygon
+        '''
+        tmp = GDSII_Boundary()
+        tmp.xy = val
+        val = tmp.xy
+        a = self._offset[index]
+        b = self._offset[index+1]
+        if val.size == b - a:
+            self._xy[a:b] = val
+        else:
+            self._xy = np.concatenate((self._xy[:a],val,self._xy[b:self._nXY]))
+            self._offset[index+1:self._n+1] += val.size - (b - a)
+            self._nXY = self._xy.size
+
+    def toList(self):
+        '''
+        toList()
+
+        Returns the boundary elements as a list of GDSII_Boundary objects
+        '''
+        tmp = []
+        for i in range(self._n):
+            E = GDSII_Boundary()
+            E.setBoundary(self._xy[self._offset[i]:self._offset[i+1]].copy(), int(self._layer[i]), int(self._datatype[i]))
+            tmp.append(E)
+        return tmp
+
+    def recordSize(self):
+        '''
+        recordSize()
+
+        Returns the number of bytes of the binary of all boundary elements
+        '''
+        return 24*self._n + 4*self._nXY
+
+    def fillRecord(self, record, pointer):
+        '''
+        fillRecord(record, pointer)
+
+        Writes the binary of all boundary elements into a preallocated record
+
+        Parameters
+        ----------
+        record : numpy.ndarray of type numpy.uint8
+            A preallocated record with at least recordSize() bytes from pointer
+        pointer : integer
+            Position of the first byte of the first element in the record
+
+        Results
+        -------
+        pointer : integer
+            Position following the last byte of the last element
+
+        Description
+        -----------
+        Every field of a boundary element is 2 byte aligned, so all elements
+        are assembled at once as an array of big-endian 2 byte words.  Each
+        element is 10 header words, 2 words per coordinate and 2 end words.
+        '''
+        if self._n == 0:
+            return pointer
+        nXY = np.diff(self.offset)
+        start = np.append(0,np.cumsum(12 + 2*nXY)[:-1])
+        word = np.zeros(self.recordSize()/2,dtype='>u2')
+        mask = np.ones(word.size,dtype=np.bool)
+        header = [4, self._cBoundary, 6, self._cLayer, self.layer, 6, self._cDatatype, self.datatype, 4*nXY+4, self._cXY]
+        for i in range(10):
+            word[start+i] = header[i]
+            mask[start+i] = False
+        word[start+10+2*nXY] = 4
+        word[start+11+2*nXY] = self._cEnd
+        mask[start+10+2*nXY] = False
+        mask[start+11+2*nXY] = False
+        word[mask] = self.xy.astype('>i4').view('>u2')
+        record[pointer:pointer+2*word.size] = word.view(np.uint8)
+        return pointer + 2*word.size
+
+
+class GDSII_BoundaryView(object):
+    '''
+    GDSII_BoundaryView class : subclass of object
+
+    A boundary element stored in a GDSII_BoundaryArray
+
+    The view exposes the layer, datatype and xy parameters of a
+    GDSII_Boundary.  The xy parameter is a view into the concatenated vertex
+    array of the GDSII_BoundaryArray.
+    '''
+
+    def __init__(self, array, index):
+        self._array = array
+        self._index = index
+
+    def __repr__(self):
+        print 'Boundary element'
+        print 'layer:             ' , self.layer
+        print 'datatype:          ' , self.datatype
+        print 'xy:                ' , self.xy
+        return ''
+
+    @property
+    def layer(self):
+        '''
+        layer : integer from 0 to 255
+            The layer number for this boundary element
+        '''
+        return int(self._array._layer[self._index])
+
+    @layer.setter
+    def layer(self, val):
+        if val < 0 or val > 256:
+            raise ValueError('GDSII_BoundaryView.layer : This parameter must range from 0 to 255')
+        self._array._layer[self._index] = val
+
+    @property
+    def datatype(self):
+        '''
+        datatype : integer from 0 to 255
+            The datatype number for this boundary element
+        '''
+        return int(self._array._datatype[self._index])
+
+    @datatype.setter
+    def datatype(self, val):
+        if val < 0 or val >= 256:
+            raise ValueError('GDSII_BoundaryView.datatype : This parameter must range from 0 to 255')
+        self._array._datatype[self._index] = val
+
+    @property
+    def xy(self):
+        '''
+        xy : numpy.ndarray of type numpy.int32
+            An array containing the verticies of a polygon in the form
+            [x1 y1 x2 y2 ... xn yn x1 y1]
+        '''
+        a = self._array._offset[self._index]
+        b = self._array._offset[self._index+1]
+        return self._array._xy[a:b]
+
+    @xy.setter
+    def xy(self, val):
+        self._array.setXY(self._index, val)
+
+    def recordSize(self):
+        return 24 + self.xy.size*4
+
+    def fillRecord(self, record, pointer):
+        E = GDSII_Boundary()
+        E.setBoundary(self.xy, self.layer, self.datatype)
+        return E.fillRecord(record, pointer)
+
+def test():
+    a = GDSII_BoundaryArray()
+    b = GDSII_Boundary()
+    b.setBoundary([1111,2222,-3333,-4444,-5555,-6666,7777,0],2,1)
+    a.append(b)
+    a.extend([np.array([0,0,0,5,5,5,5,0],dtype=np.int32),np.array([0,0,10,0,10,10,0,0],dtype=np.int32)],[3,4],[5,6])
+    print a
+    for i in a:
+        print i
+    a.genRecord()
+    c = []
+    for i in a.toList():
+        i.genRecord()
+        c.append(i.record)
+    print 'Identical binary : ' , np.array_equal(a.record,np.concatenate(c))
+
+def benchmark(nBoundary = 200000):
+    '''
+    benchmark(nBoundary = 200000)
+
+    Compares reading, iterating and writing a structure with nBoundary
+    squares using GDSII_Boundary objects and a GDSII_BoundaryArray
+    '''
+    from GDSII_Library import GDSII_Library
+    a = GDSII_Library()
+    a.addStructure('main')
+    xy = np.array([0,0,40,0,40,40,0,40,0,0],dtype=np.int32)
+    a.structure[0].columnar = True
+    a.structure[0].boundary.extend([xy + 100*(i%1000) for i in range(nBoundary)], [0]*nBoundary, [i%8 for i in range(nBoundary)])
+    a.writeFile('GDSII_Benchmark.gds')
+
+    print 'Mode       Read [s]   Iterate [s]   Write [s]'
+    for columnar in [False, True]:
+        b = GDSII_Library()
+        b.columnar = columnar
+        t0 = time.time()
+        b.readFile('GDSII_Benchmark.gds')
+        t1 = time.time()
+        total = 0
+        for i in b.structure[0].boundary:
+            total += i.xy.size + i.datatype
+        t2 = time.time()
+        b.genRecord()
+        t3 = time.time()
+        print '%-8s   %8.3f   %11.3f   %9.3f' % (['object','columnar'][columnar], t1-t0, t2-t1, t3-t2)
+
+if __name__ == '__main__':
+    test()
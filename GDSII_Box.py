@@ -1,6 +1,7 @@
 #!/usr/bin/env ipython
 
 import numpy as np
+import struct
 from GDSII import GDSII
 
 class GDSII_Box(GDSII):
@@ -163,49 +164,49 @@ class GDSII_Box(GDSII):
     def cPLEX(self):
         return self._cPLEX
 
-    def genRecord(self):
+    def recordSize(self):
         '''
-        genRecord()
+        recordSize()
         
-        Generates the boundary element binary
+        Returns the number of bytes of the box element binary
+        '''
+        return 24 + self.xy.size*4
+        
+    def fillRecord(self, record, pointer):
+        '''
+        fillRecord(record, pointer)
+        
+        Writes the box element binary into a preallocated record
+        
+        Parameters
+        ----------
+        record : numpy.ndarray of type numpy.uint8
+            A preallocated record with at least recordSize() bytes from pointer
+        pointer : integer
+            Position of the first byte of the element in the record
+            
+        Results
+        -------
+        pointer : integer
+            Position following the last byte of the element
         
         Description
         -----------
-        The boundary element is specified by records in thefollowing order:
+        The box element is specified by records in thefollowing order:
             Box
             ELFLAGS (optional)
             PLEX (optional)
             Layer
-            Datatype
+            Boxtype
             XY
         '''
-        self.recordClear()
-        
-        #Box start
-        self.record = self.dec2byte(4)
-        self.record = self.dec2byte(self.cBox)
-        
-        #Define Layer
-        self.record = self.dec2byte(6)
-        self.record = self.dec2byte(self.cLayer)
-        self.record = self.dec2byte(self.layer)
-        
-        #Define boxtype
-        self.record = self.dec2byte(6)
-        self.record = self.dec2byte(self.cBoxtype)
-        self.record = self.dec2byte(self.boxtype)
-
-        #Define xy    
-        self.record = self.dec2byte(self.xy.size*4+4)
-        self.record = self.dec2byte(self.cXY)
-        for i in self.xy:
-            self.record = self.dec2byte(i,4)
-            
-        #Element end
-        self.record = self.dec2byte(4)
-        self.record = self.dec2byte(self.cEnd)
-        
-        self.recordClip()
+        nByte = self.xy.size*4
+        struct.pack_into('>10H', record, pointer, 4, self.cBox, 6, self.cLayer, self.layer, 6, self.cBoxtype, self.boxtype, nByte+4, self.cXY)
+        pointer += 20
+        record[pointer:pointer+nByte] = self.xy.astype('>i4').view(np.uint8)
+        pointer += nByte
+        struct.pack_into('>2H', record, pointer, 4, self.cEnd)
+        return pointer + 4
             
     def readRecord(self, record):
         '''
@@ -2,6 +2,7 @@
 
 from GDSII_Library import GDSII_Library
 import numpy as np
+import time
 
 class GDSII_Director(object):
     '''
@@ -476,6 +477,34 @@ def main():
     G.addCellRef('main',tmp,xy)    
     
     G.writeFile('Test.gds')
+
+def benchmark(nBoundary = 1000000, maxTime = 60.0):
+    '''
+    benchmark(nBoundary = 1000000, maxTime = 60.0)
+    
+    Regression benchmark for writing a library with many boundaries
+    
+    Parameters
+    ----------
+    nBoundary : integer
+        Number of squares in the cell
+    maxTime : float
+        The benchmark fails if writing the file takes longer than maxTime
+        seconds
+    '''
+    G = GDSII_Director()
+    t0 = time.time()
+    xy = G.drawSquare(40)
+    polygon = [xy + np.array([i%1000,i/1000]*(xy.size/2),dtype=np.int32)*100 for i in range(nBoundary)]
+    G.addCell('main',polygon,[0])
+    t1 = time.time()
+    G.writeFile('GDSII_Benchmark.gds')
+    t2 = time.time()
+    print 'Boundaries:        ' , nBoundary
+    print 'Build time [s]:    ' , round(t1-t0,2)
+    print 'Write time [s]:    ' , round(t2-t1,2)
+    if t2-t1 > maxTime:
+        raise ValueError('GDSII_Director.benchmark() : Writing ' + str(nBoundary) + ' boundaries took longer than ' + str(maxTime) + ' s')
    
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -3,7 +3,9 @@
 import numpy as np
 import re
 import datetime as dt
-import copy
+import time
+import struct
+import mmap
 from GDSII import GDSII
 from GDSII_Structure import GDSII_Structure
 
@@ -37,8 +39,19 @@ class GDSII_Library(GDSII):
        addText             =   Adds a text to a structure
        addNode             =   Adds a node to a structure
        readFile            =   Reads a *.gds file into the library
+       decodeRecord        =   Reads a library record with the vectorized
+                               decoder
+       iterStructures      =   Reads a *.gds file one structure at a time
+       mapRecord           =   Indexes the structures of a library record
+                               without parsing their elements
        writeFile           =   Writes the library into a *.gds file
+       writeStream         =   Writes the library to a file-like object one
+                               structure at a time
+       structureIndex      =   Returns the index of a structure
        genHierarchy        =   Creates a hierarchy tree
+       
+    Setting columnar to True stores the boundary elements of the structures
+    created by the library in a GDSII_BoundaryArray.
            
     Long Chang, UH, May 2013
     '''
@@ -53,7 +66,10 @@ class GDSII_Library(GDSII):
         self._dbUnit = 1000
         self._unit = 0.000000001              #userUnit/dbUnit
         self._structureName = []
+        self._structureIndex = {}
         self._structure = []
+        self._map = None
+        self._columnar = False
         
         self._cVersion          = 0x0002
         self._cLibrary          = 0x0102    #Library begin
@@ -61,6 +77,7 @@ class GDSII_Library(GDSII):
         self._cUnit             = 0x0305    #Library unit
         self._cLibraryEnd       = 0x0400    #Library end
         self._cStructure        = 0x0502    #Structure start
+        self._cStructureName    = 0x0606    #Structure name
         self._cStructureEnd     = 0x0700    #Structure end
 
     def __repr__(self):
@@ -137,7 +154,7 @@ class GDSII_Library(GDSII):
             raise TypeError('GDSII_Library.libraryName : This parameter must be of type str')
         if len(val) > 32:
             raise ValueError('GDSII_Library.libraryName : This parameter cannot be longer than 32 characters')
-        regex = re.compile('[\W^?^$]')
+        regex = re.compile('[^\w?$]')
         if not regex.search(val) == None:
             raise ValueError('GDSII_Library.libraryName : This parameter must contain only the following characters: A-Z, a-z, 0-9, _, ? and $')
         self._libraryName = val
@@ -203,13 +220,50 @@ class GDSII_Library(GDSII):
             raise TypeError('GDSII_Library.structureName : This parameter must be of type str')
         if len(val) > 32:
             raise ValueError('GDSII_Library.structureName : This parameter cannot be longer than 32 characters')
-        regex = re.compile('[\W^?^$]')
+        regex = re.compile('[^\w?$]')
         if not regex.search(val) == None:
             raise ValueError('GDSII_Library.structureName : This parameter must contain only the following characters: A-Z, a-z, 0-9, _, ? and $')
-        if val in self._structureName:
+        if val in self._structureIndex:
             raise ValueError('GDSII_Library.structureName : A structure with the same name already exist in the library')
+        self._structureIndex[val] = len(self._structureName)
         self._structureName.append(val)
 
+    def structureIndex(self, structureName):
+        '''
+        structureIndex(structureName)
+        
+        Returns the index of a structure in the library
+        
+        Parameters
+        ----------
+        structureName : string
+            Name of the structure
+            
+        Description
+        -----------
+        The index is looked up in a dictionary that is updated whenever a
+        structure name is added by addStructure, so the cost does not grow
+        with the number of structures.  A ValueError is raised if the name is
+        not in the library, the same as structureName.index().
+        '''
+        try:
+            return self._structureIndex[structureName]
+        except KeyError:
+            raise ValueError('GDSII_Library.structureIndex() : The structureName does not exist in the library')
+
+    @property
+    def columnar(self):
+        '''
+        columnar : boolean
+            If True, structures created by the library store their boundary
+            elements in a GDSII_BoundaryArray
+        '''
+        return self._columnar
+    
+    @columnar.setter
+    def columnar(self, val):
+        self._columnar = bool(val)
+
     @property
     def cVersion(self):
         '''
@@ -258,6 +312,14 @@ class GDSII_Library(GDSII):
         '''
         return self._cStructure
         
+    @property
+    def cStructureName(self):
+        '''
+        cStructureName : 0x0606
+            Command code for structure name
+        '''
+        return self._cStructureName
+        
     @property
     def cStructureEnd(self):
         '''
@@ -319,6 +381,7 @@ class GDSII_Library(GDSII):
         elif isinstance(val,str):
             self.structureName = val
             self.structure = GDSII_Structure(val)
+            self.structure[-1].columnar = self.columnar
         else:
             raise TypeError('GDSII_Library.addStructure : The input parameter must be either a string or a GDSII_Structure')
         
@@ -341,7 +404,7 @@ class GDSII_Library(GDSII):
             The datatype number
         '''
         try:
-            self.structure[self.structureName.index(structureName)].addBoundary(xy,layer,datatype)
+            self.structure[self.structureIndex(structureName)].addBoundary(xy,layer,datatype)
         except:
             raise ValueError('GDSII_Library.addBoundary() : The structureName does not exist in the library')
     
@@ -370,7 +433,7 @@ class GDSII_Library(GDSII):
             counterclockwise about the origin
         '''
         try:
-            self.structure[self.structureName.index(structureName)].addSRef(referenceName, xy, reflection, mag, angle)
+            self.structure[self.structureIndex(structureName)].addSRef(referenceName, xy, reflection, mag, angle)
         except:
             raise ValueError('GDSII_Library.addSRef() : The structureName does not exist in the library')
     
@@ -411,7 +474,7 @@ class GDSII_Library(GDSII):
             counterclockwise about the origin
         '''
         try:
-            self.structure[self.structureName.index(structureName)].addARef(referenceName, xy, pitchX, pitchY, nX, nY, xRot, yRot, reflection, mag, angle)
+            self.structure[self.structureIndex(structureName)].addARef(referenceName, xy, pitchX, pitchY, nX, nY, xRot, yRot, reflection, mag, angle)
         except:
             raise ValueError('GDSII_Library.addARef() : The structureName does not exist in the library')
     
@@ -441,7 +504,7 @@ class GDSII_Library(GDSII):
                 2   Square ends that overlap terminals by one-half the width
         '''
         try:
-            self.structure[self.structureName.index(structureName)].addPath(xy, layer, datatype, width, pathtype)
+            self.structure[self.structureIndex(structureName)].addPath(xy, layer, datatype, width, pathtype)
         except:
             raise ValueError('GDSII_Library.addBoundary() : The structureName does not exist in the library')
     
@@ -464,7 +527,7 @@ class GDSII_Library(GDSII):
             The boxtype number
         '''    
         try:
-            self.structure[self.structureName.index(structureName)].addBox(xy, layer, boxtype)
+            self.structure[self.structureIndex(structureName)].addBox(xy, layer, boxtype)
         except:
             raise ValueError('GDSII_Library.addBox() : The structureName does not exist in the library')
     
@@ -516,7 +579,7 @@ class GDSII_Library(GDSII):
             structure about the origin
         '''    
         try:
-            self.structure[self.structureName.index(structureName)].addText(text, xy, layer, texttype, presentation, pathtype, width, reflection, mag, angle)
+            self.structure[self.structureIndex(structureName)].addText(text, xy, layer, texttype, presentation, pathtype, width, reflection, mag, angle)
         except:
             raise ValueError('GDSII_Library.addText() : The structureName does not exist in the library')
     
@@ -539,72 +602,103 @@ class GDSII_Library(GDSII):
             The nodetype number
         '''
         try:
-            self.structure[self.structureName.index(structureName)].addNode(xy, layer, nodetype)
+            self.structure[self.structureIndex(structureName)].addNode(xy, layer, nodetype)
         except:
             raise ValueError('GDSII_Library.addNode() : The structureName does not exist in the library')
     
-    def genRecord(self):
+    def headerSize(self):
+        '''
+        headerSize()
+        
+        Returns the number of bytes of the library header binary
+        '''
+        return 54 + self.stringSize(self.libraryName)
+        
+    def fillHeader(self, record, pointer):
         '''
-        genRecord()
+        fillHeader(record, pointer)
+        
+        Writes the library header binary into a preallocated record
         
-        Generates the structure record binary
+        Parameters
+        ----------
+        record : numpy.ndarray of type numpy.uint8
+            A preallocated record with at least headerSize() bytes from pointer
+        pointer : integer
+            Position of the first byte of the header in the record
+            
+        Results
+        -------
+        pointer : integer
+            Position following the last byte of the header
         
         Description
         -----------
-        The structure record is specified by records in the following order:
+        The library header is specified by records in the following order:
+            Version
             Library
             LibraryName
             Units
-            StructureRecords
-            Boundary Element    (optional)
-            SRef element        (optional)
-            ARef element        (optional)
-            Path element        (optional)
-            Text element        (optional)
-            Box element         (optional)
-            Node element        (optional)
         '''
-        self.recordClear()
+        #Version and library start
+        struct.pack_into('>17H', record, pointer, 6, self.cVersion, self.version, 28, self.cLibrary, *(self.dom + self.doa))
+        pointer += 34
         
-        #Version
-        self.record = self.dec2byte(6)
-        self.record = self.dec2byte(self.cVersion)
-        self.record = self.dec2byte(self.version)
-        
-        #Library start
-        self.record = self.dec2byte(28)
-        self.record = self.dec2byte(self.cLibrary)
-        for i in self.dom:
-            self.record = self.dec2byte(i)
-        for i in self.doa:
-            self.record = self.dec2byte(i)
-
         #Define library name
-        if len(self.libraryName)%2 == 1:
-            self.record = self.dec2byte(len(self.libraryName)+5)
-        else:
-            self.record = self.dec2byte(len(self.libraryName)+4)
-        self.record = self.dec2byte(self.cLibraryName)
-        self.record = np.array([ord(i) for i in self.libraryName],dtype=np.uint8)
-        if len(self.libraryName)%2 == 1:
-            self.record = np.zeros(1,dtype=np.uint8)
+        pointer = self.fillString(record, pointer, self.cLibraryName, self.libraryName)
         
         #Define units
-        self.record = self.dec2byte(20)
-        self.record = self.dec2byte(self.cUnit)
-        self.record = self.dec2fbin(self.userUnit*self.dbUnit)
-        self.record = self.dec2fbin(self.userUnit/self.dbUnit)
+        return self.fillReal(record, pointer, self.cUnit, [self.userUnit*self.dbUnit,self.userUnit/self.dbUnit])
+
+    def recordSize(self):
+        '''
+        recordSize()
+        
+        Returns the number of bytes of the library record binary
+        '''
+        size = self.headerSize() + 4
+        for i in self.structure:
+            size += i.recordSize()
+        return size
+        
+    def fillRecord(self, record, pointer):
+        '''
+        fillRecord(record, pointer)
+        
+        Writes the library record binary into a preallocated record
+        
+        Parameters
+        ----------
+        record : numpy.ndarray of type numpy.uint8
+            A preallocated record with at least recordSize() bytes from pointer
+        pointer : integer
+            Position of the first byte of the library in the record
+            
+        Results
+        -------
+        pointer : integer
+            Position following the last byte of the library
+        
+        Description
+        -----------
+        The library record is specified by records in the following order:
+            Version
+            Library
+            LibraryName
+            Units
+            StructureRecords
+            LibraryEnd
+        '''
+        #Library header
+        pointer = self.fillHeader(record, pointer)
         
         #Add structure records
         for i in self.structure:
-            i.genRecord()
-            self.record = i.record
+            pointer = i.fillRecord(record, pointer)
             
         #Library end
-        self.record = self.dec2byte(4)
-        self.record = self.dec2byte(self.cLibraryEnd)
-        
-        self.recordClip()
+        struct.pack_into('>2H', record, pointer, 4, self.cLibraryEnd)
+        return pointer + 4
             
     def readRecord(self, record):
         '''
@@ -653,8 +747,7 @@ class GDSII_Library(GDSII):
         
         #Units
         if self.byte2dec(record[self.opCodePointer]) == self.cUnit:
-            umd = self.fbin2dec(record[self.pointer+4:self.pointer+12])
-            udd = self.fbin2dec(record[self.pointer+12:self.pointer+20])
+            umd, udd = self.fbin2decArray(record[self.pointer+4:self.pointer+20])
             self.userUnit = np.sqrt(umd*udd)
             self.dbUnit = int(np.sqrt(umd/udd))
             self.pointer += 20
@@ -673,15 +766,133 @@ class GDSII_Library(GDSII):
             
             #Read structur record
             S = GDSII_Structure()
+            S.columnar = self.columnar
             S.readRecord(record[self.pointer:tp])
             self.addStructure(S)
             
             #Point to next structure
             self.pointer = tp
 
-    def readFile(self, filename):
+    def decodeRecord(self, record):
+        '''
+        decodeRecord(record)
+        
+        Reads the library record using the vectorized decoder
+        
+        Parameters
+        ----------
+        record : numpy.ndarray of type numpy.uint8
+            The binary pattern data
+            
+        Description
+        -----------
+        This method produces the same library as readRecord.  The record
+        headers are walked once to build an offset/length/opCode index, then
+        all integer and XY payloads are decoded in bulk with big-endian numpy
+        views instead of converting every value with byte2dec.
+        '''
+        offset, length, opCode = self.indexRecord(record)
+        value, data = self.decodeIndex(record, offset, length, opCode)
+        
+        #Version
+        if opCode.size > 0 and opCode[0] == self.cVersion:
+            self.version = int(value[0])
+        else:
+            raise ValueError('GDSII_Library.decodeRecord() : The GDSII version is not defined')
+        
+        #Library record
+        if opCode.size > 1 and opCode[1] == self.cLibrary:
+            tmp = record[offset[1]+4:offset[1]+28].view('>u2').tolist()
+            self.dom = tmp[0:6]
+            self.doa = tmp[6:12]
+        else:
+            raise ValueError('GDSII_Library.decodeRecord() : The record is not a library record')
+            
+        #Library name
+        if opCode.size > 2 and opCode[2] == self.cLibraryName:
+            self.libraryName = record[offset[2]+4:offset[2]+length[2]].tostring().rstrip('\0')
+        else:
+            raise ValueError('GDSII_Library.decodeRecord() : The library name is not defined')
+        
+        #Units
+        if opCode.size > 3 and opCode[3] == self.cUnit:
+            umd, udd = data[3]
+            self.userUnit = np.sqrt(umd*udd)
+            self.dbUnit = int(np.sqrt(umd/udd))
+        else:
+            raise ValueError('GDSII_Library.decodeRecord() : The GDSII units is not defined')
+            
+        #Structures
+        i = 4
+        while i < opCode.size and not opCode[i] == self.cLibraryEnd:
+            S = GDSII_Structure()
+            S.columnar = self.columnar
+            i = S.readIndex(record, offset, length, opCode, value, data, i)
+            self.addStructure(S)
+
+    def mapRecord(self, record):
+        '''
+        mapRecord(record)
+        
+        Reads the library record lazily
+        
+        Parameters
+        ----------
+        record : numpy.ndarray of type numpy.uint8
+            The binary pattern data
+            
+        Description
+        -----------
+        Only the library header and the structure begin, structure name and
+        structure end records are decoded.  Each structure is added with its
+        unparsed byte range as the lazyRecord, so the elements are parsed only
+        when the structure is first accessed, for example by genHierarchyTree
+        or convGDS2ELD.  The record is not copied, so it may be a memory map
+        of the file.
+        '''
+        unpack = struct.Struct('>HH').unpack_from
+        buf = buffer(record)
+        size = record.size
+        
+        def readHeader(p):
+            if p + 4 > size:
+                raise ValueError('GDSII_Library.mapRecord() : Unexpected end of record')
+            nByte, opCode = unpack(buf, p)
+            if nByte < 4:
+                raise ValueError('GDSII_Library.mapRecord() : Invalid record length')
+            return nByte, opCode
+        
+        #Library header up to the first structure
+        p = 0
+        nByte, opCode = readHeader(p)
+        while not opCode in [self.cStructure, self.cLibraryEnd]:
+            p += nByte
+            nByte, opCode = readHeader(p)
+        self.decodeRecord(np.concatenate((record[:p],self.dec2byte(4),self.dec2byte(self.cLibraryEnd))))
+        
+        #Structures
+        while not opCode == self.cLibraryEnd:
+            if not opCode == self.cStructure:
+                raise ValueError('GDSII_Library.mapRecord() : The record is not a structure record')
+            start = p
+            p += nByte
+            nByte, opCode = readHeader(p)
+            if not opCode == self.cStructureName:
+                raise ValueError('GDSII_Library.mapRecord() : The structure name is not defined')
+            name = record[p+4:p+nByte].tostring().rstrip('\0')
+            while not opCode == self.cStructureEnd:
+                p += nByte
+                nByte, opCode = readHeader(p)
+            p += nByte
+            S = GDSII_Structure(name)
+            S.columnar = self.columnar
+            S.lazyRecord = record[start:p]
+            self.addStructure(S)
+            nByte, opCode = readHeader(p)
+
+    def readFile(self, filename, lazy = False):
         '''
-        readFile(filename)
+        readFile(filename, lazy = False)
         
         Reads a GDSII file and populate the library object
         
@@ -689,15 +900,95 @@ class GDSII_Library(GDSII):
         ----------
         filename : string
             Name of GDSII file
+        lazy : boolean
+            If True, the file is memory mapped and the elements of each
+            structure are parsed only when the structure is first accessed
         '''
         if not isinstance(filename,str):
             raise TypeError('GDSII_Library.readFile() : The filename must be a string')
         if filename[-4:].lower() == '.gds':
             filename = filename[:-4]
         f = open(filename + '.gds','rb')
-        record = np.fromfile(f, dtype=np.uint8)
-        f.close()
-        self.readRecord(record)
+        if lazy:
+            self._map = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+            f.close()
+            self.mapRecord(np.frombuffer(self._map, dtype=np.uint8))
+        else:
+            record = np.fromfile(f, dtype=np.uint8)
+            f.close()
+            self.decodeRecord(record)
+        
+    def iterStructures(self, filename):
+        '''
+        iterStructures(filename)
+        
+        Reads a GDSII file and yields one structure at a time
+        
+        Parameters
+        ----------
+        filename : string
+            Name of GDSII file
+            
+        Results
+        -------
+        structure : GDSII_Structure
+            Each structure in the order stored in the file
+            
+        Description
+        -----------
+        The library parameters (version, dates, libraryName and units) are
+        read from the file header before the first structure is yielded.  The
+        file is read record by record from a buffered file handle, so only a
+        single structure is held in memory at any time.  The structures are
+        not added to the library, for example:
+            for S in library.iterStructures('stamp'):
+                if S.structureName == 'main':
+                    library.addStructure(S)
+        '''
+        if not isinstance(filename,str):
+            raise TypeError('GDSII_Library.iterStructures() : The filename must be a string')
+        if filename[-4:].lower() == '.gds':
+            filename = filename[:-4]
+        f = open(filename + '.gds','rb')
+        unpack = struct.Struct('>HH').unpack
+        
+        def readHeader():
+            tmp = f.read(4)
+            if len(tmp) < 4:
+                raise ValueError('GDSII_Library.iterStructures() : Unexpected end of file')
+            nByte, opCode = unpack(tmp)
+            if nByte < 4:
+                raise ValueError('GDSII_Library.iterStructures() : Invalid record length')
+            return tmp, nByte, opCode
+            
+        try:
+            #Library header up to the first structure or the library end
+            chunk = []
+            tmp, nByte, opCode = readHeader()
+            while not opCode in [self.cStructure, self.cLibraryEnd]:
+                chunk.append(tmp + f.read(nByte-4))
+                tmp, nByte, opCode = readHeader()
+            chunk.append(self.dec2byte(4).tostring() + self.dec2byte(self.cLibraryEnd).tostring())
+            self.decodeRecord(np.frombuffer(''.join(chunk),dtype=np.uint8))
+            
+            #Structures
+            while not opCode == self.cLibraryEnd:
+                if not opCode == self.cStructure:
+                    raise ValueError('GDSII_Library.iterStructures() : The record is not a structure record')
+                chunk = [tmp + f.read(nByte-4)]
+                while not opCode == self.cStructureEnd:
+                    tmp, nByte, opCode = readHeader()
+                    chunk.append(tmp + f.read(nByte-4))
+                record = np.frombuffer(''.join(chunk),dtype=np.uint8)
+                offset, length, code = self.indexRecord(record)
+                value, data = self.decodeIndex(record, offset, length, code)
+                S = GDSII_Structure()
+                S.columnar = self.columnar
+                S.readIndex(record, offset, length, code, value, data)
+                yield S
+                tmp, nByte, opCode = readHeader()
+        finally:
+            f.close()
         
     def writeFile(self, filename):
         '''
@@ -715,9 +1006,39 @@ class GDSII_Library(GDSII):
         if filename[-4:].lower() == '.gds':
             filename = filename[:-4]
         f = open(filename + '.gds','wb')
-        self.genRecord()
-        f.write(self.record)
-        f.close()
+        try:
+            self.writeStream(f)
+        finally:
+            f.close()
+            
+    def writeStream(self, f):
+        '''
+        writeStream(f)
+        
+        Writes the library to a file-like object one structure at a time
+        
+        Parameters
+        ----------
+        f : file-like object
+            An object with a write method, such as a file opened in binary
+            mode
+            
+        Description
+        -----------
+        The header, each structure record and the library end record are
+        generated and written in turn, so only the binary of a single
+        structure is held in memory.  The output is identical to the binary
+        from genRecord.
+        '''
+        record = np.zeros(self.headerSize(),dtype=np.uint8)
+        self.fillHeader(record, 0)
+        f.write(record.tostring())
+        for i in self.structure:
+            record = np.zeros(i.recordSize(),dtype=np.uint8)
+            if not i.fillRecord(record, 0) == record.size:
+                raise ValueError('GDSII_Library.writeStream() : The generated binary does not match the record size')
+            f.write(record.tostring())
+        f.write(struct.pack('>2H', 4, self.cLibraryEnd))
            
     def genHierarchyTree(self, structureName):
         '''
@@ -744,149 +1065,80 @@ class GDSII_Library(GDSII):
         branchRepeatNumber : list of integers
             The repeat number of a branch
             
-        Note
-        ----
-        Maximum number of repeat is 256
-        '''
-        try:
-            nameList, indexList = self.recursiveBranching(structureName,self.structureName.index(structureName))
-            hierarchyList, accessList = self.branchDecode(nameList, indexList)
-            uniqueHierarchyList = [hierarchyList[0]]
-            tmpIndexList = [accessList[0]]
-            branchIndexList = []
-            branchRepeatNumber = [1]
-            uniqueHierarchyList = [hierarchyList[0]]
-            for i in range(1,len(hierarchyList)):
-                if hierarchyList[i] == hierarchyList[i-1]:
-                    branchRepeatNumber[-1] += 1
-                    tmpIndexList.append(accessList[i])
-                else:            
-                    uniqueHierarchyList.append(hierarchyList[i])
-                    branchRepeatNumber.append(1)
-                    branchIndexList.append(np.array(tmpIndexList,dtype=np.int32))
-                    tmpIndexList = [accessList[i]]
-            branchIndexList.append(np.array(tmpIndexList,dtype=np.int32))
-            
-            return uniqueHierarchyList, branchIndexList, branchRepeatNumber
-        except:
-            raise ValueError('GDSII_Library.genHierarchyTree : The specified cell does not have a tree')
-        
-    def recursiveBranching(self, referenceName, index):
-        '''
-        recursiveBranching(referenceName)
-        
-        Recursively finds the branches of a structure hierarchy
-        
-        Parameters
-        ----------
-        referenceName : string
-            Name of the first structure in the hierarchy
-            
-        Results
-        -------
-        nameList : list of strings
-            An encoded list of structure names representing the branches of a 
-            hierarchy tree
-        indexList : list of integers
-            An encoded list of structure indices representing the branches of a 
-            hierarchy tree
-        typeList : list of reference type
-            An encoded list of reference type for the corresponding indexList
-            
-        Description:
-        This method recursively steps through the specified structure and
-        generates a list of all referenced structure.  The list is encoded to
-        optimize the branching algorithm.  For example, the tree below
+        Description
+        -----------
+        The tree is walked depth first with an explicit stack, SRefs before
+        ARefs.  Every path from structureName to a structure without
+        references is a branch.  Consecutive branches through the same
+        structures are merged and counted by branchRepeatNumber.  For example,
+        the tree below
                                 a   
                             b       c
                          c    c     d
                          d    d
-         will result in a list:
-         ['a', 'b', 'c', 'd', 'd', 'c', 'c', 'd', 'd', 'c', 'b', 'c', 'd', 'd', 'c', 'a']
-         A structure name will always encapsulate all referenced structure.
-         A structure name that encapsulates nothing means that it does not
-         contain a structure reference.
-        '''
-        nameList = [referenceName]
-        indexList = [index]
-        
-        #Recursively step through each referenced structure
-        for i in range(len(self.structure[self.structureName.index(referenceName)].sref)):
-            nameTmp, indexTmp = self.recursiveBranching(self.structure[self.structureName.index(referenceName)].sref[i].referenceName, i+1)
-            nameList.extend(nameTmp)
-            indexList.extend(indexTmp)
-        for i in range(len(self.structure[self.structureName.index(referenceName)].aref)):
-            nameTmp, indexTmp = self.recursiveBranching(self.structure[self.structureName.index(referenceName)].aref[i].referenceName, -i-1)
-            nameList.extend(nameTmp)
-            indexList.extend(indexTmp)
-            
-        #Add referenceName to the end of the list
-        nameList.append(referenceName)
-        indexList.append(index)
-        
-        return nameList, indexList
-        
-    def branchDecode(self, nameList, indexList):
+        has the branches [a,b,c,d], [a,b,c,d] and [a,c,d], which results in
+        the hierarchyList [[a,b,c,d],[a,c,d]] and branchRepeatNumber [2,1].
+        There is no limit on the depth of the hierarchy or the number of
+        repeats.
         '''
-        branchDecode(nameList, indexList)
+        try:
+            top = self.structureIndex(structureName)
+        except ValueError:
+            raise ValueError('GDSII_Library.genHierarchyTree : The specified cell does not have a tree')
         
-        Decodes the name list from the recursiveBranch method
+        #References of each structure as (structure index, access code)
+        referenceList = {}
+        def getReference(index):
+            if not index in referenceList:
+                tmp = self.structure[index]
+                referenceList[index] = [(self.structureIndex(j.referenceName), i+1) for i, j in enumerate(tmp.sref)] + \
+                                       [(self.structureIndex(j.referenceName), -i-1) for i, j in enumerate(tmp.aref)]
+            return referenceList[index]
         
-        Parameters
-        ----------
-        nameList : List of strings
-            An encoded structure reference name list from the recursiveBranch
-            method
-            
-        indexList : List of integers
-            An encoded index list from the recursiveBranch method
-            
-        Results
-        -------
-        hierarchyList : A list of a list of integer indices
-            Each sub-list is a single branch of the hierarchy tree
-            
-        accessList : A list of a list of integer indices
-            Each sub-list is a code for accessing each branch of the tree
-            The first element is the index of the top structure
-            The remaining elements are codes that refer to SRef or ARef indices
-                to access the referenced structure as described by the 
-                hierarchyList
-                A positive integer codes for SRef indices
-                A negative integer codes for ARef indices
-                Since zero cannot be negative, all indices begin with 1
-                Example:  SRef[2] will be coded as 3
-                          ARef[0] will be coded as -1
-        
-        Note
-        ----
-        This method supports only 256 levels of hierarchy or structure nests
-        '''
-        #Convert a list of structure names to a list of structure indices
-        structureIndexList = np.array([self.structureName.index(i) for i in nameList],dtype=np.uint32)
-        
-        #A list that tracks the branch progression
-        tmpStructureIndexList = [structureIndexList[0]]
-        tmpAccessIndexList = [indexList[0]]
-        #Tracks if the branch is progressing forward (deeper) or backwards
-        forward = True
-        #A list of completed branches
-        hierarchyList = []
-        accessList = []
-        #Steps through the indexList and extract each branch of the hierarchy
-        for i in range(1,len(structureIndexList[1:])):
-            if not structureIndexList[i] == tmpStructureIndexList[-1]:
-                tmpStructureIndexList.append(structureIndexList[i])
-                tmpAccessIndexList.append(indexList[i])
-                forward = True
+        uniqueHierarchyList = []
+        branchIndexList = []
+        branchRepeatNumber = []
+        tmpIndexList = []
+        
+        #The current branch and the next reference to visit at each level
+        hierarchy = [top]
+        access = [top]
+        pointer = [0]
+        onBranch = set(hierarchy)
+        while pointer:
+            try:
+                reference = getReference(hierarchy[-1])
+            except ValueError:
+                raise ValueError('GDSII_Library.genHierarchyTree : A referenced structure does not exist in the library')
+            if pointer[-1] < len(reference):
+                index, code = reference[pointer[-1]]
+                pointer[-1] += 1
+                if index in onBranch:
+                    raise ValueError('GDSII_Library.genHierarchyTree : The structure ' + self.structureName[index] + ' references itself through its hierarchy')
+                hierarchy.append(index)
+                onBranch.add(index)
+                access.append(code)
+                pointer.append(0)
             else:
-                if forward:
-                    hierarchyList.append(copy.copy(tmpStructureIndexList))
-                    accessList.append(copy.copy(tmpAccessIndexList))
-                forward = False
-                tmpStructureIndexList.pop()
-                tmpAccessIndexList.pop()
-        return hierarchyList, accessList
+                if len(reference) == 0 and len(hierarchy) > 1:
+                    if uniqueHierarchyList and hierarchy == uniqueHierarchyList[-1]:
+                        branchRepeatNumber[-1] += 1
+                    else:
+                        if tmpIndexList:
+                            branchIndexList.append(np.array(tmpIndexList,dtype=np.int32))
+                        uniqueHierarchyList.append(list(hierarchy))
+                        branchRepeatNumber.append(1)
+                        tmpIndexList = []
+                    tmpIndexList.append(list(access))
+                onBranch.discard(hierarchy.pop())
+                access.pop()
+                pointer.pop()
+        
+        if not uniqueHierarchyList:
+            raise ValueError('GDSII_Library.genHierarchyTree : The specified cell does not have a tree')
+        branchIndexList.append(np.array(tmpIndexList,dtype=np.int32))
+        
+        return uniqueHierarchyList, branchIndexList, branchRepeatNumber
         
 def test():
 #    a = GDSII_Library('libraryTest')
@@ -940,5 +1192,125 @@ def test():
     print brNum
     c.writeFile('GDSII_Write.gds')
 
+def compareLibrary(a, b):
+    '''
+    compareLibrary(a, b)
+    
+    Returns True if both libraries contain the same structures and elements
+    '''
+    def compareElement(x, y):
+        if not type(x) == type(y):
+            return False
+        for key in vars(x):
+            if key in ['_record', '_recordIndex', '_pointer', '_opCodePointer']:
+                continue
+            u = getattr(x,key)
+            v = getattr(y,key)
+            if isinstance(u,np.ndarray) or isinstance(v,np.ndarray):
+                if not np.array_equal(u,v):
+                    return False
+            elif not u == v:
+                return False
+        return True
+    
+    if not a.structureName == b.structureName:
+        return False
+    if not (a.libraryName, a.userUnit, a.dbUnit) == (b.libraryName, b.userUnit, b.dbUnit):
+        return False
+    for s, t in zip(a.structure, b.structure):
+        for attr in ['boundary','sref','aref','path','text','box','node']:
+            if not len(getattr(s,attr)) == len(getattr(t,attr)):
+                return False
+            for x, y in zip(getattr(s,attr), getattr(t,attr)):
+                if not compareElement(x,y):
+                    return False
+    return True
+
+def benchmark(filenames = ['Channel','stamp']):
+    '''
+    benchmark(filenames = ['Channel','stamp'])
+    
+    Compares the byte2dec based readRecord against the vectorized decodeRecord
+    '''
+    print 'File                Records   readRecord [s]   decodeRecord [s]   Speedup   Identical'
+    for filename in filenames:
+        record = np.fromfile(filename + '.gds', dtype=np.uint8)
+        nRecord = GDSII().indexRecord(record)[0].size
+        
+        a = GDSII_Library()
+        t0 = time.time()
+        a.readRecord(record)
+        t1 = time.time()
+        b = GDSII_Library()
+        b.decodeRecord(record)
+        t2 = time.time()
+        
+        print '%-18s  %7d   %14.4f   %16.4f   %6.1fx   %s' % (filename, nRecord, t1-t0, t2-t1, (t1-t0)/(t2-t1), compareLibrary(a,b))
+
+def genSyntheticLibrary(nLevel = 10, nStructure = 5000, nReference = 2, nTop = 8):
+    '''
+    genSyntheticLibrary(nLevel = 10, nStructure = 5000, nReference = 2, nTop = 8)
+    
+    Generates a library with a deep structure hierarchy
+    
+    Parameters
+    ----------
+    nLevel : integer
+        Number of hierarchy levels
+    nStructure : integer
+        Number of structures, divided equally between the levels
+    nReference : integer
+        Number of references from each structure to the next level
+        Even references are SRef and odd references are ARef
+    nTop : integer
+        Number of structures of the first level referenced by the structure
+        'top'
+        
+    Results
+    -------
+    library : GDSII_Library
+        The structures of the last level contain a single boundary element
+    '''
+    nPerLevel = nStructure/nLevel
+    a = GDSII_Library('synthetic')
+    a.addStructure('top')
+    for i in range(nLevel):
+        for j in range(nPerLevel):
+            a.addStructure('L%dS%d' % (i,j))
+    for i in range(nTop):
+        a.addSRef('top', 'L0S%d' % i, [100*i,0])
+    for i in range(nLevel-1):
+        for j in range(nPerLevel):
+            for k in range(nReference):
+                name = 'L%dS%d' % (i+1,(j*nReference+k)%nPerLevel)
+                if k%2 == 0:
+                    a.addSRef('L%dS%d' % (i,j), name, [0,10*k])
+                else:
+                    a.addARef('L%dS%d' % (i,j), name, [0,10*k], 10, 10, 2, 2)
+    for j in range(nPerLevel):
+        a.addBoundary('L%dS%d' % (nLevel-1,j), [0,0,0,5,5,5,5,0])
+    return a
+
+def benchmarkHierarchy(nLevel = 10, nStructure = 5000, nReference = 2, nTop = 8, nDeep = 5000):
+    '''
+    benchmarkHierarchy(nLevel = 10, nStructure = 5000, nReference = 2, nTop = 8, nDeep = 5000)
+    
+    Times genHierarchyTree on a library from genSyntheticLibrary and on a
+    chain of nDeep nested structures
+    '''
+    a = genSyntheticLibrary(nLevel, nStructure, nReference, nTop)
+    t0 = time.time()
+    hierarchyList, branchIndexList, branchRepeatNumber = a.genHierarchyTree('top')
+    t1 = time.time()
+    print 'Levels   Structures   Branches   Leaves   genHierarchyTree [s]'
+    print '%6d   %10d   %8d   %6d   %20.4f' % (nLevel+1, len(a.structure), len(hierarchyList), sum(branchRepeatNumber), t1-t0)
+    
+    #A single chain of nested structures
+    a = genSyntheticLibrary(nDeep, nDeep, 1, 1)
+    t0 = time.time()
+    hierarchyList, branchIndexList, branchRepeatNumber = a.genHierarchyTree('top')
+    t1 = time.time()
+    print '%6d   %10d   %8d   %6d   %20.4f' % (nDeep+1, len(a.structure), len(hierarchyList), sum(branchRepeatNumber), t1-t0)
+
 if __name__ == '__main__':
     test()
@@ -1,6 +1,7 @@
 #!/usr/bin/env ipython
 
 import numpy as np
+import struct
 from GDSII import GDSII
 
 class GDSII_Path(GDSII):
@@ -219,11 +220,36 @@ class GDSII_Path(GDSII):
     def cPLEX(self):
         return self._cPLEX
 
-    def genRecord(self):
+    def recordSize(self):
         '''
-        genRecord()
+        recordSize()
         
-        Generates the path element binary
+        Returns the number of bytes of the path element binary
+        '''
+        size = 24 + self.xy.size*4
+        if not self.pathtype == None:
+            size += 6
+        if not self.width == None:
+            size += 8
+        return size
+        
+    def fillRecord(self, record, pointer):
+        '''
+        fillRecord(record, pointer)
+        
+        Writes the path element binary into a preallocated record
+        
+        Parameters
+        ----------
+        record : numpy.ndarray of type numpy.uint8
+            A preallocated record with at least recordSize() bytes from pointer
+        pointer : integer
+            Position of the first byte of the element in the record
+            
+        Results
+        -------
+        pointer : integer
+            Position following the last byte of the element
         
         Description
         -----------
@@ -237,45 +263,27 @@ class GDSII_Path(GDSII):
             Width       (optional)
             XY
         '''
-        self.recordClear()
-        
-        #Path start
-        self.record = self.dec2byte(4)
-        self.record = self.dec2byte(self.cPath)
-        
-        #Define Layer
-        self.record = self.dec2byte(6)
-        self.record = self.dec2byte(self.cLayer)
-        self.record = self.dec2byte(self.layer)
-        
-        #Define datatype
-        self.record = self.dec2byte(6)
-        self.record = self.dec2byte(self.cDatatype)
-        self.record = self.dec2byte(self.datatype)
+        struct.pack_into('>8H', record, pointer, 4, self.cPath, 6, self.cLayer, self.layer, 6, self.cDatatype, self.datatype)
+        pointer += 16
         
         #Define pathtype
         if not self.pathtype == None:
-            self.record = self.dec2byte(6)
-            self.record = self.dec2byte(self.cPathtype)
-            self.record = self.dec2byte(self.pathtype)
+            struct.pack_into('>3H', record, pointer, 6, self.cPathtype, self.pathtype)
+            pointer += 6
         
         #Define width
         if not self.width == None:
-            self.record = self.dec2byte(6)
-            self.record = self.dec2byte(self.cWidthtype)
-            self.record = self.dec2byte(self.widthtype)
+            struct.pack_into('>2Hi', record, pointer, 8, self.cWidth, self.width)
+            pointer += 8
 
-        #Define xy    
-        self.record = self.dec2byte(self.xy.size*4+4)
-        self.record = self.dec2byte(self.cXY)
-        for i in self.xy:
-            self.record = self.dec2byte(i,4)
-            
-        #Element end
-        self.record = self.dec2byte(4)
-        self.record = self.dec2byte(self.cEnd)
-        
-        self.recordClip()
+        #Define xy
+        nByte = self.xy.size*4
+        struct.pack_into('>2H', record, pointer, nByte+4, self.cXY)
+        pointer += 4
+        record[pointer:pointer+nByte] = self.xy.astype('>i4').view(np.uint8)
+        pointer += nByte
+        struct.pack_into('>2H', record, pointer, 4, self.cEnd)
+        return pointer + 4
             
     def readRecord(self, record):
         '''
@@ -321,8 +329,8 @@ class GDSII_Path(GDSII):
             
         #Width
         if self.byte2dec(record[self.opCodePointer]) == self.cWidth:
-            self.width = self.byte2dec(record[[self.pointer+4,self.pointer+5]])
-            self.pointer += 6
+            self.width = self.byte2dec(record[self.pointer+4:self.pointer+8])
+            self.pointer += 8
         
         #XY
         if self.byte2dec(record[self.opCodePointer]) == self.cXY:
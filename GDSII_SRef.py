@@ -1,6 +1,7 @@
 #!/usr/bin/env ipython
 
 import numpy as np
+import struct
 import re
 from GDSII import GDSII
 
@@ -71,7 +72,7 @@ class GDSII_SRef(GDSII):
             raise TypeError('GDSII_SRef.referenceName : This parameter must be of type str')
         if len(val) > 32:
             raise ValueError('GDSII_SRef.referenceName : This parameter cannot be longer than 32 characters')
-        regex = re.compile('[\W^?^$]')
+        regex = re.compile('[^\w?$]')
         if not regex.search(val) == None:
             raise ValueError('GDSII_SRef.referenceName : This parameter must contain only the following characters: A-Z, a-z, 0-9, _, ? and $')
         self._referenceName = val        
@@ -246,11 +247,39 @@ class GDSII_SRef(GDSII):
     def cPLEX(self):
         return self._cPLEX
 
-    def genRecord(self):
+    def recordSize(self):
         '''
-        genRecord()
+        recordSize()
         
-        Generates the structure reference element binary
+        Returns the number of bytes of the structure reference element binary
+        '''
+        size = 20 + self.stringSize(self.referenceName)
+        if not self.strans == 0:
+            size += 6
+        if not self.mag == 1:
+            size += 12
+        if not self.angle == 0:
+            size += 12
+        return size
+        
+    def fillRecord(self, record, pointer):
+        '''
+        fillRecord(record, pointer)
+        
+        Writes the structure reference element binary into a preallocated
+        record
+        
+        Parameters
+        ----------
+        record : numpy.ndarray of type numpy.uint8
+            A preallocated record with at least recordSize() bytes from pointer
+        pointer : integer
+            Position of the first byte of the element in the record
+            
+        Results
+        -------
+        pointer : integer
+            Position following the last byte of the element
         
         Description
         -----------
@@ -265,51 +294,25 @@ class GDSII_SRef(GDSII):
             Angle           (optional)
             XY
         '''
-        self.recordClear()
-        
-        #Structure reference start
-        self.record = self.dec2byte(4)
-        self.record = self.dec2byte(self.cSRef)
-        
-        #Define reference structure name
-        if len(self.referenceName)%2 == 1:
-            self.record = self.dec2byte(len(self.referenceName)+5)
-        else:
-            self.record = self.dec2byte(len(self.referenceName)+4)
-        self.record = self.dec2byte(self.cReferenceName)
-        self.record = np.array([ord(i) for i in self.referenceName],dtype=np.uint8)
-        if len(self.referenceName)%2 == 1:
-            self.record = np.zeros(1,dtype=np.uint8)
+        struct.pack_into('>2H', record, pointer, 4, self.cSRef)
+        pointer = self.fillString(record, pointer+4, self.cReferenceName, self.referenceName)
         
         #Define strans
         if not self.strans == 0:
-            self.record = self.dec2byte(6)
-            self.record = self.dec2byte(self.cSTrans)
-            self.record = self.dec2byte(self.strans)
-
+            struct.pack_into('>3H', record, pointer, 6, self.cSTrans, self.strans)
+            pointer += 6
+        
         #Define mag
         if not self.mag == 1:
-            self.record = self.dec2byte(12)
-            self.record = self.dec2byte(self.cMag)
-            self.record = self.dec2fbin(self.mag)
-            
-        #Define angle            
-        if not self.angle == 0:
-            self.record = self.dec2byte(12)
-            self.record = self.dec2byte(self.cAngle)
-            self.record = self.dec2fbin(self.angle)
+            pointer = self.fillReal(record, pointer, self.cMag, self.mag)
         
-        #Define xy
-        self.record = self.dec2byte(12)
-        self.record = self.dec2byte(self.cXY)
-        self.record = self.dec2byte(self.xy[0],4)
-        self.record = self.dec2byte(self.xy[1],4)
+        #Define angle
+        if not self.angle == 0:
+            pointer = self.fillReal(record, pointer, self.cAngle, self.angle)
             
-        #Element end
-        self.record = self.dec2byte(4)
-        self.record = self.dec2byte(self.cEnd)
-        
-        self.recordClip()
+        #Define xy and element end
+        struct.pack_into('>2H2i2H', record, pointer, 12, self.cXY, self.xy[0], self.xy[1], 4, self.cEnd)
+        return pointer + 16
             
     def readRecord(self, record):
         '''
@@ -355,12 +358,12 @@ class GDSII_SRef(GDSII):
         
             #Mag
             if self.byte2dec(record[self.opCodePointer]) == self.cMag:
-                self.mag = self.fbin2dec(record[self.pointer+4:self.pointer+12])
+                self.mag = self.fbin2decArray(record[self.pointer+4:self.pointer+12])[0]
                 self.pointer += 12
                 
             #Angle
             if self.byte2dec(record[self.opCodePointer]) == self.cAngle:
-                self.angle = self.fbin2dec(record[self.pointer+4:self.pointer+12])
+                self.angle = self.fbin2decArray(record[self.pointer+4:self.pointer+12])[0]
                 self.pointer += 12
         else:
             self.mag = 1
@@ -1,12 +1,14 @@
 #!/usr/bin/env ipython
 
 import numpy as np
+import struct
 import re
 import datetime as dt
 from GDSII import GDSII
 from GDSII_ARef import GDSII_ARef
 from GDSII_SRef import GDSII_SRef
 from GDSII_Boundary import GDSII_Boundary
+from GDSII_BoundaryArray import GDSII_BoundaryArray
 from GDSII_Text import GDSII_Text
 from GDSII_Path import GDSII_Path
 from GDSII_Box import GDSII_Box
@@ -39,6 +41,12 @@ class GDSII_Structure(GDSII):
        addNode             =   Adds a node element
        genRecord           =   Generate the record binary
        readRecord          =   Reads a structure record
+       readIndex           =   Reads a structure record from a decoded index
+       loadRecord          =   Parses the elements of a lazily read structure
+       
+    The boundary elements are kept in a list of GDSII_Boundary objects by
+    default.  Setting columnar to True stores them in a GDSII_BoundaryArray
+    instead, which holds all vertices in one array and behaves like the list.
        
     Long Chang, UH, May 2013
     '''
@@ -55,6 +63,8 @@ class GDSII_Structure(GDSII):
         self._box = []
         self._node = []
         self._text = []
+        self._lazyRecord = None
+        self._columnar = False
         
         self._cStructure        = 0x0502    #Structure begin
         self._cStructureName    = 0x0606    #Structure name
@@ -128,7 +138,7 @@ class GDSII_Structure(GDSII):
             raise TypeError('GDSII_Structure.structureName : This parameter must be of type str')
         if len(val) > 32:
             raise ValueError('GDSII_Structure.structureName : This parameter cannot be longer than 32 characters')
-        regex = re.compile('[\W^?^$]')
+        regex = re.compile('[^\w?$]')
         if not regex.search(val) == None:
             raise ValueError('GDSII_Structure.structureName : This parameter must contain only the following characters: A-Z, a-z, 0-9, _, ? and $')
         self._structureName = val   
@@ -139,12 +149,14 @@ class GDSII_Structure(GDSII):
         aref : list of GDSII_ARef objects
             A list of array of structure references
         '''
+        self.loadRecord()
         return self._aref
     
     @aref.setter
     def aref(self,val):
         if not isinstance(val,GDSII_ARef):
             raise('GDSII_Structure.aref : This parameter must be an instance of GDSII_ARef')
+        self.loadRecord()
         self._aref.append(val)
         
     @property
@@ -153,26 +165,30 @@ class GDSII_Structure(GDSII):
         sref : list of GDSII_SRef objects
             A list of structure references
         '''
+        self.loadRecord()
         return self._sref
     
     @sref.setter
     def sref(self,val):
         if not isinstance(val,GDSII_SRef):
             raise('GDSII_Structure.sref : This parameter must be an instance of GDSII_SRef')
+        self.loadRecord()
         self._sref.append(val)
         
     @property
     def boundary(self):
         '''
-        boundary : list of GDSII_Boundary objects
+        boundary : list of GDSII_Boundary objects or GDSII_BoundaryArray
             A list of array of boundary elements
         '''
+        self.loadRecord()
         return self._boundary
     
     @boundary.setter
     def boundary(self,val):
         if not isinstance(val,GDSII_Boundary):
             raise('GDSII_Structure.boundary : This parameter must be an instance of GDSII_Boundary')
+        self.loadRecord()
         self._boundary.append(val)
 
     @property
@@ -181,12 +197,14 @@ class GDSII_Structure(GDSII):
         text : list of GDSII_Text objects
             A list of array of structure references
         '''
+        self.loadRecord()
         return self._text
     
     @text.setter
     def text(self,val):
         if not isinstance(val,GDSII_Text):
             raise('GDSII_Structure.text : This parameter must be an instance of GDSII_Text')
+        self.loadRecord()
         self._text.append(val)
 
     @property
@@ -195,12 +213,14 @@ class GDSII_Structure(GDSII):
         path : list of GDSII_Path objects
             A list of path elements
         '''
+        self.loadRecord()
         return self._path
     
     @path.setter
     def path(self,val):
         if not isinstance(val,GDSII_Path):
             raise('GDSII_Structure.path : This parameter must be an instance of GDSII_Path')
+        self.loadRecord()
         self._path.append(val)
         
     @property
@@ -209,12 +229,14 @@ class GDSII_Structure(GDSII):
         box : list of GDSII_Box objects
             A list of box elements
         '''
+        self.loadRecord()
         return self._box
     
     @box.setter
     def box(self,val):
         if not isinstance(val,GDSII_Box):
             raise('GDSII_Structure.box : This parameter must be an instance of GDSII_Box')
+        self.loadRecord()
         self._box.append(val)
         
     @property
@@ -223,14 +245,51 @@ class GDSII_Structure(GDSII):
         node : list of GDSII_Node objects
             A list of node elements
         '''
+        self.loadRecord()
         return self._node
     
     @node.setter
     def node(self,val):
         if not isinstance(val,GDSII_Node):
             raise('GDSII_Structure.node : This parameter must be an instance of GDSII_Node')
+        self.loadRecord()
         self._node.append(val)
 
+    @property
+    def columnar(self):
+        '''
+        columnar : boolean
+            True if the boundary elements are stored in a GDSII_BoundaryArray
+            False if the boundary elements are stored in a list of
+            GDSII_Boundary objects
+        '''
+        return self._columnar
+    
+    @columnar.setter
+    def columnar(self, val):
+        val = bool(val)
+        if val and not self._columnar:
+            self._boundary = GDSII_BoundaryArray(self._boundary)
+        elif not val and self._columnar:
+            self._boundary = self._boundary.toList()
+        self._columnar = val
+
+    @property
+    def lazyRecord(self):
+        '''
+        lazyRecord : numpy.ndarray of type numpy.uint8 or None
+            The unparsed structure record of a lazily read structure
+            The elements are parsed from this record by loadRecord the first
+            time they are accessed
+        '''
+        return self._lazyRecord
+    
+    @lazyRecord.setter
+    def lazyRecord(self, val):
+        if not val is None and not isinstance(val,np.ndarray):
+            raise TypeError('GDSII_Structure.lazyRecord : This parameter must be of type numpy.ndarray')
+        self._lazyRecord = val
+
     @property
     def cStructure(self):
         '''
@@ -538,11 +597,39 @@ class GDSII_Structure(GDSII):
         tmp.setNode(xy, layer, nodetype)
         self.node = tmp
 
-    def genRecord(self):
+    def recordSize(self):
+        '''
+        recordSize()
+        
+        Returns the number of bytes of the structure record binary
         '''
-        genRecord()
+        if not self._lazyRecord is None:
+            return self._lazyRecord.size
+        size = 32 + self.stringSize(self.structureName)
+        if self._columnar:
+            size += self._boundary.recordSize()
+        for i in [[] if self._columnar else self._boundary, self._sref, self._aref, self._path, self._text, self._box, self._node]:
+            for j in i:
+                size += j.recordSize()
+        return size
         
-        Generates the structure record binary
+    def fillRecord(self, record, pointer):
+        '''
+        fillRecord(record, pointer)
+        
+        Writes the structure record binary into a preallocated record
+        
+        Parameters
+        ----------
+        record : numpy.ndarray of type numpy.uint8
+            A preallocated record with at least recordSize() bytes from pointer
+        pointer : integer
+            Position of the first byte of the structure in the record
+            
+        Results
+        -------
+        pointer : integer
+            Position following the last byte of the structure
         
         Description
         -----------
@@ -556,67 +643,29 @@ class GDSII_Structure(GDSII):
             Text element        (optional)
             Box element         (optional)
             Node element        (optional)
+        A lazily read structure that has not been parsed is copied verbatim.
         '''
-        self.recordClear()    
+        if not self._lazyRecord is None:
+            record[pointer:pointer+self._lazyRecord.size] = self._lazyRecord
+            return pointer + self._lazyRecord.size
         
         #Structure start
-        self.record = self.dec2byte(28)
-        self.record = self.dec2byte(self.cStructure)
-        for i in self.dom:
-            self.record = self.dec2byte(i)
-        for i in self.doa:
-            self.record = self.dec2byte(i)
-
+        struct.pack_into('>14H', record, pointer, 28, self.cStructure, *(self.dom + self.doa))
+        pointer += 28
+        
         #Define structure name
-        if len(self.structureName)%2 == 1:
-            self.record = self.dec2byte(len(self.structureName)+5)
-        else:
-            self.record = self.dec2byte(len(self.structureName)+4)
-        self.record = self.dec2byte(self.cStructureName)
-        self.record = np.array([ord(i) for i in self.structureName],dtype=np.uint8)
-        if len(self.structureName)%2 == 1:
-            self.record = np.zeros(1,dtype=np.uint8)
-        
-        #Add boundary elements
-        for i in self.boundary:
-            i.genRecord()
-            self.record = i.record
-        
-        #Add sref elements
-        for i in self.sref:
-            i.genRecord()
-            self.record = i.record
-            
-        #Add aref elements
-        for i in self.aref:
-            i.genRecord()
-            self.record = i.record
-            
-        #Add path elements
-        for i in self.path:
-            i.genRecord()
-            self.record = i.record
-            
-        #Add text elements
-        for i in self.text:
-            i.genRecord()
-            self.record = i.record
-            
-        #Add box elements
-        for i in self.box:
-            i.genRecord()
-            self.record = i.record
-            
-        #Add node elements
-        for i in self.node:
-            i.genRecord()
-            self.record = i.record
+        pointer = self.fillString(record, pointer, self.cStructureName, self.structureName)
+        
+        #Add elements
+        if self._columnar:
+            pointer = self._boundary.fillRecord(record, pointer)
+        for i in [[] if self._columnar else self._boundary, self._sref, self._aref, self._path, self._text, self._box, self._node]:
+            for j in i:
+                pointer = j.fillRecord(record, pointer)
             
         #Structure end
-        self.record = self.dec2byte(4)
-        self.record = self.dec2byte(self.cStructureEnd)
-        
-        self.recordClip()
+        struct.pack_into('>2H', record, pointer, 4, self.cStructureEnd)
+        return pointer + 4
             
     def readRecord(self, record):
         '''
@@ -702,6 +751,156 @@ class GDSII_Structure(GDSII):
             #Point to next element
             self.pointer = tp
             
+    def readIndex(self, record, offset, length, opCode, value, data, start = 0):
+        '''
+        readIndex(record, offset, length, opCode, value, data, start = 0)
+        
+        Reads a structure record from a pre-decoded record index
+        
+        Parameters
+        ----------
+        record : numpy.ndarray of type numpy.uint8
+            The binary pattern data
+        offset, length, opCode : numpy.ndarray
+            The record index from the indexRecord method
+        value, data : numpy.ndarray and dictionary
+            The decoded payloads from the decodeIndex method
+        start : integer
+            The record number of the structure begin record
+            
+        Results
+        -------
+        index : integer
+            The record number following the structure end record
+            
+        Description
+        -----------
+        This is the counterpart of readRecord for the vectorized decoder.  The
+        integer and coordinate payloads are already decoded, so each element
+        is populated directly from the index without converting the bytes one
+        at a time.  Columnar structures collect the boundary elements and add
+        them to the GDSII_BoundaryArray at once.
+        '''
+        opCode = opCode.tolist()
+        value = value.tolist()
+        
+        #Check if record is a structure record
+        if not opCode[start] == self.cStructure:
+            raise ValueError('GDSII_Structure.readIndex() : The record is not a structure record')
+        tmp = record[offset[start]+4:offset[start]+28].view('>u2').tolist()
+        self.dom = tmp[0:6]
+        self.doa = tmp[6:12]
+        
+        #Structure name
+        i = start + 1
+        if opCode[i] == self.cStructureName:
+            self.structureName = record[offset[i]+4:offset[i]+length[i]].tostring().rstrip('\0')
+        else:
+            raise ValueError('GDSII_Structure.readIndex() : The structure name is not defined')
+        i += 1
+        
+        #Elements
+        elementList = {self.cBoundary : (GDSII_Boundary, self._boundary),
+                       self.cSRef     : (GDSII_SRef,     self._sref),
+                       self.cARef     : (GDSII_ARef,     self._aref),
+                       self.cPath     : (GDSII_Path,     self._path),
+                       self.cText     : (GDSII_Text,     self._text),
+                       self.cBox      : (GDSII_Box,      self._box),
+                       self.cNode     : (GDSII_Node,     self._node)}
+        propertyList = {0x0D02 : 'layer',
+                        0x0E02 : 'datatype',
+                        0x1602 : 'texttype',
+                        0x2E02 : 'boxtype',
+                        0x2A02 : 'nodetype',
+                        0x2102 : 'pathtype',
+                        0x1701 : 'presentation'}
+        bXY = []
+        bLayer = []
+        bDatatype = []
+        while not opCode[i] == self.cStructureEnd:
+            elementType = opCode[i]
+            if elementType == self.cBoundary and self._columnar:
+                i += 1
+                while not opCode[i] == self.cElementEnd:
+                    c = opCode[i]
+                    if c == 0x0D02:
+                        bLayer.append(value[i])
+                    elif c == 0x0E02:
+                        bDatatype.append(value[i])
+                    elif c == 0x1003:
+                        bXY.append(data[i])
+                    i += 1
+                i += 1
+                continue
+            if not elementType in elementList:
+                raise ValueError('GDSII_Structure.readIndex() : Unknown element record')
+            E = elementList[elementType][0]()
+            if elementType in [self.cSRef, self.cARef, self.cText]:
+                E.reflection = 0
+                E.mag = 1
+                E.angle = 0
+            i += 1
+            while not opCode[i] == self.cElementEnd:
+                c = opCode[i]
+                if c in propertyList:
+                    setattr(E,propertyList[c],value[i])
+                elif c == 0x1003:
+                    if elementType == self.cARef:
+                        E.xy = data[i][0:2]
+                        E.xx = data[i][2:4]
+                        E.yy = data[i][4:6]
+                        E.pitchX = np.sqrt(np.sum(np.int64(E.xx-E.xy)**2))/E.nX
+                        E.pitchY = np.sqrt(np.sum(np.int64(E.yy-E.xy)**2))/E.nY
+                        tmp = E.xx-E.xy
+                        E.xRot = np.arctan2(tmp[1],tmp[0])*180/np.pi
+                        tmp = E.yy-E.xy
+                        E.yRot = np.arctan2(tmp[1],tmp[0])*180/np.pi+90
+                    elif elementType in [self.cSRef, self.cText]:
+                        E.xy = data[i][0:2]
+                    else:
+                        E.xy = data[i]
+                elif c == 0x1206:
+                    E.referenceName = record[offset[i]+4:offset[i]+length[i]].tostring().rstrip('\0')
+                elif c == 0x1906:
+                    E.text = record[offset[i]+4:offset[i]+length[i]].tostring().rstrip('\0')
+                elif c == 0x1A01:
+                    E.strans = value[i]
+                    if E.strans > 2**15-1:
+                        E.reflection = 1
+                elif c == 0x1B05:
+                    E.mag = float(data[i][0])
+                elif c == 0x1C05:
+                    E.angle = float(data[i][0])
+                elif c == 0x1302:
+                    E.nX = value[i]
+                    E.nY = int(record[offset[i]+6])*256 + int(record[offset[i]+7])
+                elif c == 0x0F03:
+                    E.width = int(record[offset[i]+4:offset[i]+8].view('>i4')[0])
+                i += 1
+            elementList[elementType][1].append(E)
+            i += 1
+        
+        if not len(bLayer) == len(bXY) or not len(bDatatype) == len(bXY):
+            raise ValueError('GDSII_Structure.readIndex() : The layer or datatype number of a boundary element is not defined')
+        if self._columnar:
+            self._boundary.extend(bXY, bLayer, bDatatype)
+        
+        return i + 1
+            
+
+    def loadRecord(self):
+        '''
+        loadRecord()
+        
+        Parses the lazyRecord, if any, and populates the element lists
+        '''
+        if self._lazyRecord is None:
+            return
+        record = self._lazyRecord
+        self._lazyRecord = None
+        offset, length, opCode = self.indexRecord(record)
+        value, data = self.decodeIndex(record, offset, length, opCode)
+        self.readIndex(record, offset, length, opCode, value, data)
 
 def test():
     a = GDSII_Structure('doseArray');
@@ -1,6 +1,7 @@
 #!/usr/bin/env ipython
 
 import numpy as np
+import struct
 from GDSII import GDSII
 
 class GDSII_Text(GDSII):
@@ -396,11 +397,44 @@ class GDSII_Text(GDSII):
     def cPLEX(self):
         return self._cPLEX
 
-    def genRecord(self):
+    def recordSize(self):
         '''
-        genRecord()
+        recordSize()
         
-        Generates the text element binary
+        Returns the number of bytes of the text element binary
+        '''
+        size = 32 + self.stringSize(self.text)
+        if not self.presentation == None:
+            size += 6
+        if not self.pathtype == None:
+            size += 6
+        if not self.width == None:
+            size += 8
+        if not self.strans == 0:
+            size += 6
+        if not self.mag == 1:
+            size += 12
+        if not self.angle == 0:
+            size += 12
+        return size
+        
+    def fillRecord(self, record, pointer):
+        '''
+        fillRecord(record, pointer)
+        
+        Writes the text element binary into a preallocated record
+        
+        Parameters
+        ----------
+        record : numpy.ndarray of type numpy.uint8
+            A preallocated record with at least recordSize() bytes from pointer
+        pointer : integer
+            Position of the first byte of the element in the record
+            
+        Results
+        -------
+        pointer : integer
+            Position following the last byte of the element
         
         Description
         -----------
@@ -419,74 +453,45 @@ class GDSII_Text(GDSII):
             XY
             TextString
         '''
-        self.recordClear()
-        
-        #Text start
-        self.record = self.dec2byte(4)
-        self.record = self.dec2byte(self.cText)
-        
-        #Define Layer
-        self.record = self.dec2byte(6)
-        self.record = self.dec2byte(self.cLayer)
-        self.record = self.dec2byte(self.layer)
-        
-        #Define texttype
-        self.record = self.dec2byte(6)
-        self.record = self.dec2byte(self.cTexttype)
-        self.record = self.dec2byte(self.texttype)
+        struct.pack_into('>8H', record, pointer, 4, self.cText, 6, self.cLayer, self.layer, 6, self.cTexttype, self.texttype)
+        pointer += 16
         
         #Define presentation
         if not self.presentation == None:
-            self.record = self.dec2byte(6)
-            self.record = self.dec2byte(self.cPresentation)
-            self.record = self.dec2byte(self.presentation)        
+            struct.pack_into('>3H', record, pointer, 6, self.cPresentation, self.presentation)
+            pointer += 6
         
         #Define pathtype
         if not self.pathtype == None:
-            self.record = self.dec2byte(6)
-            self.record = self.dec2byte(self.cPathtype)
-            self.record = self.dec2byte(self.pathtype)
+            struct.pack_into('>3H', record, pointer, 6, self.cPathtype, self.pathtype)
+            pointer += 6
         
         #Define width
         if not self.width == None:
-            self.record = self.dec2byte(6)
-            self.record = self.dec2byte(self.cWidthtype)
-            self.record = self.dec2byte(self.widthtype)
-
+            struct.pack_into('>2Hi', record, pointer, 8, self.cWidth, self.width)
+            pointer += 8
+            
         #Define strans
         if not self.strans == 0:
-            self.record = self.dec2byte(6)
-            self.record = self.dec2byte(self.cSTrans)
-            self.record = self.dec2byte(self.strans)
-
+            struct.pack_into('>3H', record, pointer, 6, self.cSTrans, self.strans)
+            pointer += 6
+        
         #Define mag
         if not self.mag == 1:
-            self.record = self.dec2byte(12)
-            self.record = self.dec2byte(self.cMag)
-            self.record = self.dec2fbin(self.mag)
-            
-        #Define angle            
+            pointer = self.fillReal(record, pointer, self.cMag, self.mag)
+        
+        #Define angle
         if not self.angle == 0:
-            self.record = self.dec2byte(12)
-            self.record = self.dec2byte(self.cAngle)
-            self.record = self.dec2fbin(self.angle)
-
-        #Define xy    
-        self.record = self.dec2byte(12)
-        self.record = self.dec2byte(self.cXY)
-        self.record = self.dec2byte(self.xy[0],4)
-        self.record = self.dec2byte(self.xy[1],4)
+            pointer = self.fillReal(record, pointer, self.cAngle, self.angle)
             
-        #Define text string
-        self.record = self.dec2byte(len(self.text)+4)
-        self.record = self.dec2byte(self.cString)
-        self.record = np.array([ord(i) for i in self.text],dtype=np.uint8)
-            
-        #Element end
-        self.record = self.dec2byte(4)
-        self.record = self.dec2byte(self.cEnd)
-        
-        self.recordClip()
+        #Define xy
+        struct.pack_into('>2H2i', record, pointer, 12, self.cXY, self.xy[0], self.xy[1])
+        pointer += 12
+        
+        #Define text string and element end
+        pointer = self.fillString(record, pointer, self.cString, self.text)
+        struct.pack_into('>2H', record, pointer, 4, self.cEnd)
+        return pointer + 4
             
     def readRecord(self, record):
         '''
@@ -537,8 +542,8 @@ class GDSII_Text(GDSII):
             
         #Width
         if self.byte2dec(record[self.opCodePointer]) == self.cWidth:
-            self.width = self.byte2dec(record[[self.pointer+4,self.pointer+5]])
-            self.pointer += 6
+            self.width = self.byte2dec(record[self.pointer+4:self.pointer+8])
+            self.pointer += 8
             
         #Structure transformation
         if self.byte2dec(record[self.opCodePointer]) == self.cSTrans:
@@ -549,12 +554,12 @@ class GDSII_Text(GDSII):
         
             #Mag
             if self.byte2dec(record[self.opCodePointer]) == self.cMag:
-                self.mag = self.fbin2dec(record[self.pointer+4:self.pointer+12])
+                self.mag = self.fbin2decArray(record[self.pointer+4:self.pointer+12])[0]
                 self.pointer += 12
                 
             #Angle
             if self.byte2dec(record[self.opCodePointer]) == self.cAngle:
-                self.angle = self.fbin2dec(record[self.pointer+4:self.pointer+12])
+                self.angle = self.fbin2decArray(record[self.pointer+4:self.pointer+12])[0]
                 self.pointer += 12
         else:
             self.reflection = 0
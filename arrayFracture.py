@@ -109,7 +109,7 @@ class arrayFracture(object):
         self.maxArrayLength = maxArrayLength
         fCell = []
         
-        pattern = copy.deepcopy(cell.pattern)
+        pattern = cell.pattern
         shotRank = copy.copy(cell.shotRank)
         pitchX = copy.copy(cell.pitchX)
         pitchY = copy.copy(cell.pitchY)
@@ -126,6 +126,7 @@ class arrayFracture(object):
                 nY = copy.copy(cell.nY)
                 for i in range(len(nX)):
                         fCell[i].pattern = copy.deepcopy(pattern)
+                        fCell[i].key = cell.key
                         if type(shotRank) is list:
                             fCell[i].shotRank.extend(shotRank)
                         else:
@@ -146,6 +147,7 @@ class arrayFracture(object):
                 nX = copy.copy(cell.nX)
                 for i in range(len(nY)):
                         fCell[i].pattern = copy.deepcopy(pattern)
+                        fCell[i].key = cell.key
                         if type(shotRank) is list:
                             fCell[i].shotRank.extend(shotRank)
                         else:
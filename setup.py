@@ -22,7 +22,7 @@ from setuptools import setup
 
 APP = ['ConverterGUI.py']
 DATA_FILES = []
-OPTIONS = {'argv_emulation': False, 'includes':['PyQt4.QtCore','PyQt4.QtGui', 'PyQt4._qt','numpy','copy','re','datetime','sys','ELD_Cell','ELD_Chip','ELD_Field','ELD_Pattern','GDS2v3','GDSII','GDSII_ARef','GDSII_Boundary','GDSII_Box','GDSII_Library','GDSII_Node','GDSII_Path','GDSII_SRef','GDSII_Structure','GDSII_Text','v3','v3_Director','v3_ID','v3_Pat','v3_TX','v3_TXB','fracture','arrayFracture']}
+OPTIONS = {'argv_emulation': False, 'includes':['PyQt4.QtCore','PyQt4.QtGui', 'PyQt4._qt','numpy','copy','re','datetime','sys','ELD_Cell','ELD_Chip','ELD_Field','ELD_Pattern','GDS2v3','GDSII','GDSII_ARef','GDSII_Boundary','GDSII_BoundaryArray','GDSII_Box','GDSII_Library','GDSII_Node','GDSII_Path','GDSII_SRef','GDSII_Structure','GDSII_Text','v3','v3_Director','v3_ID','v3_Pat','v3_TX','v3_TXB','fracture','arrayFracture']}
 
 setup(
     app=APP,
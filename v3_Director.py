@@ -58,6 +58,19 @@ class v3_Director(object):
     def TX(self,val):
         self._TX = val
 
+    @property
+    def exactPacking(self):
+        '''
+        exactPacking : boolean
+            Fill each text record up to the actual length of the next opcode
+            instead of reserving the largest opcode, see v3_Pat.exactPacking
+        '''
+        return self.TX.exactPacking
+        
+    @exactPacking.setter
+    def exactPacking(self, val):
+        self.TX.exactPacking = val
+
     def setMode(self, mode = 2):
         if mode == 2:
             self.ID.unitChipSize = 200
@@ -223,6 +236,96 @@ class v3_Director(object):
         fid.write(self.ID.record)
         fid.write(self.TX.record)
         fid.close()
+        
+    def streamFile(self, filename):
+        '''
+        streamFile(filename)
+    
+        Generates the Jeol v3.0 pattern data file one field at a time
+        
+        Parameters
+        ----------
+        filename : string consisting of up to 24 alphanumeric characters
+        
+        Description
+        -----------
+        The file is identical to the file of writeFile.  The ID record is
+        reserved at the beginning of the file and each field is added to
+        the text record and written to the file as soon as its records are
+        complete, so that only the current record is kept in memory.  The
+        ID record is written at the end when its counts are known.
+        
+        Afterwards TX.record only holds the last text record.  As with
+        writeFile, the fields have been added to TX, so a director writes a
+        single file.
+        '''
+        if filename[-4:].lower() == '.v30':
+            filename = filename[:-4]
+        self.ID.name = filename[filename.rfind('/')+1:]
+        
+        fid = open(filename + '.v30','wb')
+        try:
+            #Reserve the ID record
+            fid.write(np.zeros(self.ID.maxRecordSize,dtype=np.uint8))
+            self.TX.stream = fid
+            for i in self.field:
+                self.TX.addTextBlock(i)
+                self.TX.genTextBlock(i)
+                i.clearBlock()
+            self.TX.endRecord()
+            self.TX.stream = None
+            
+            self.ID.updateID(self.TX)
+            self.ID.genRecord()
+            fid.seek(0)
+            fid.write(self.ID.record)
+        finally:
+            self.TX.stream = None
+            fid.close()
+        
+    def validateFile(self, filename):
+        '''
+        validateFile(filename)
+        
+        Parses a Jeol v3.0 pattern data file and checks its text records
+        
+        Parameters
+        ----------
+        filename : string
+        
+        Returns
+        -------
+        count : list of 4 integers
+            [numTextRecord, numTextBlock, numRect, numTrap] found in the
+            text records
+            
+        Description
+        -----------
+        The text records are checked by v3_TX.validateRecord and the counts
+        found in the text records are compared to the counts of the ID
+        record.  A ValueError is raised if they do not agree.
+        '''
+        if filename[-4:].lower() != '.v30':
+            filename = filename + '.v30'
+        record = np.fromfile(filename,dtype=np.uint8)
+        if record.size < self.ID.maxRecordSize or record[0:2].tostring() != self.ID.identifier:
+            raise ValueError('v3_Director.validateFile() : The file ' + filename + ' does not start with an ID record')
+        
+        def value(a):
+            word = record[a[0]:a[1]].view('<u2')
+            return (int(word[0]) << 16) + int(word[1])
+        
+        ID = self.ID
+        numRecord = 1 + value(ID._anumCommentRecord) + value(ID._anumMapRecord) + value(ID._anumLibraryRecord)
+        count = self.TX.validateRecord(record[numRecord*ID.maxRecordSize:])
+        expected = [value(ID._anumTextRecord), value(ID._anumTextBlock),
+                    (value(ID._aNumRectU) << 32) + value(ID._aNumRectL),
+                    (value(ID._aNumTrapU) << 32) + value(ID._aNumTrapL)]
+        name = ['numTextRecord', 'numTextBlock', 'numRect', 'numTrap']
+        for i in range(len(name)):
+            if count[i] != expected[i]:
+                raise ValueError('v3_Director.validateFile() : The ID record has ' + name[i] + ' = ' + str(expected[i]) + ' but the text records contain ' + str(count[i]))
+        return count
             
 def test(): 
     
@@ -259,6 +362,77 @@ def test():
     print D.ID
     print D.TX
     
+    
+def benchmarkPacking(nField = [10, 100], nShape = 2000):
+    '''
+    benchmarkPacking(nField = [10, 100], nShape = 2000)
+    
+    Compares the number of text records with and without exactPacking and
+    validates both files
+    
+    Parameters
+    ----------
+    nField : list of integers
+        Number of fields
+    nShape : integer
+        Number of rectangles and of trapezoids in each field
+    '''
+    np.random.seed(0)
+    print 'Fields     sMax records   exact records'
+    for n in nField:
+        numRecord = []
+        for exactPacking in [False, True]:
+            D = v3_Director()
+            D.setMode(2)
+            D.setChipSize(1000,1000)
+            D.exactPacking = exactPacking
+            for i in range(n):
+                D.addField(i,0,i*1000,0)
+                x = np.random.randint(0,60000,nShape)
+                y = np.random.randint(0,1000000,nShape)
+                D.addPattern(i,list(np.column_stack((x,y,np.random.randint(1,500,(nShape,2))))),1)
+                D.addPattern(i,list(np.column_stack((x,y,x+40000,y,x+30000,y+20000,x+10000,y+20000))),1)
+            D.writeFile('Packing.v30')
+            numRecord.append(D.validateFile('Packing.v30')[0])
+        print '%-9d  %-12d   %d' % (n, numRecord[0], numRecord[1])
+        
+def benchmarkStream(nField = [100, 1000, 4000], nShape = 200):
+    '''
+    benchmarkStream(nField = [100, 1000, 4000], nShape = 200)
+    
+    Times writeFile and streamFile and checks that both files are identical
+    
+    Parameters
+    ----------
+    nField : list of integers
+        Number of fields
+    nShape : integer
+        Number of rectangles in each field
+    '''
+    import time
+    np.random.seed(0)
+    print 'Fields     Records    writeFile[s]   streamFile[s]'
+    for n in nField:
+        shape = np.random.randint(1,500,(n,nShape,4))
+        data = []
+        duration = []
+        for stream in [False, True]:
+            D = v3_Director()
+            D.setMode(2)
+            D.setChipSize(1000,1000)
+            for i in range(n):
+                D.addField(i,0,i*1000,0)
+                D.addPattern(i,list(shape[i]),1)
+            start = time.time()
+            if stream:
+                D.streamFile('Stream.v30')
+            else:
+                D.writeFile('Stream.v30')
+            duration.append(time.time()-start)
+            data.append(np.fromfile('Stream.v30',dtype=np.uint8))
+        if not np.array_equal(data[0][D.ID._aDOC[1]:],data[1][D.ID._aDOC[1]:]):
+            raise ValueError('v3_Director.benchmarkStream() : The files of writeFile and streamFile are different')
+        print '%-9d  %-9d  %-12.3f   %.3f' % (n, D.ID.numTextRecord, duration[0], duration[1])
 
 if __name__ == '__main__':
     test()
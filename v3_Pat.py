@@ -16,9 +16,14 @@ class v3_Pat(v3):
     
     The following methods are supported by the v3_Pat class:
        checkPrimitive:      Check if the pattern is compatible
+       batchCheckPrimitive: Check many patterns of the same size at once
+       appendPrimitive:     Appends primitives of one type
        addPattern:          Adds patterns to the object
        setPatternArray:     Sets pattern array parameters
+       encodePrimitive:     Converts all primitives of one type to bytes
+       genPrimitiveBlock:   Generates the binary data of one primitive type
        genRecord:           Generates the binary record
+       clearBlock:          Releases the binary record
     
     This class is constructed such that:
         1)  All patterns share the same shotrank if specified
@@ -35,6 +40,7 @@ class v3_Pat(v3):
         self._block = np.zeros(self._blockBuffer,dtype=np.uint8)
         self._blockIndex = 0
         self._blockSectionIndex = [0]
+        self._exactPacking = False
         self._nPat = 0
         self._lX = 0
         self._lY = 0
@@ -43,7 +49,6 @@ class v3_Pat(v3):
         self._positionSetX = -1
         self._positionSetY = -1
         self._shotRank = -1
-        self._verticesBuffer = 10
         self._rectXS = np.zeros([1,4],dtype=np.uint16)
         self._rectXM = np.zeros([1,4],dtype=np.uint32)
         self._rectXL = np.zeros([1,4],dtype=np.uint32)
@@ -102,6 +107,12 @@ class v3_Pat(v3):
                                                     #    Nx  = Number of repeats along X
                                                     #    Ny  = Number of repeats along Y
         
+        #The array of each primitive type
+        self._primitiveName = {self._cRectXS : 'rectXS', self._cRectXM : 'rectXM', self._cRectXL : 'rectXL',
+                               self._cRectYS : 'rectYS', self._cRectYM : 'rectYM', self._cRectYL : 'rectYL',
+                               self._cTrapXS : 'trapXS', self._cTrapXM : 'trapXM', self._cTrapXL : 'trapXL',
+                               self._cTrapYS : 'trapYS', self._cTrapYM : 'trapYM', self._cTrapYL : 'trapYL'}
+        
         '''
         Parameter limitation
         '''
@@ -528,6 +539,139 @@ class v3_Pat(v3):
         
         raise ValueError('v3_Pat.checkPrimitive: An unaccounted error occurred')
 
+    def batchCheckPrimitive(self, vertices):
+        '''
+        batchCheckPrimitive(vertices)
+        
+        Returns the type of primitive of many shapes with the same number of
+        vertices at once
+        
+        Parameters
+        ----------
+        vertices : Nx4, Nx6 or Nx8 numpy.ndarray of unsigned integers
+                Each row is a rectangle, triangle or trapezoid as specified
+                in checkPrimitive
+                
+        Returns
+        -------
+        cType : Nx1 numpy.ndarray of type numpy.int64
+                The opcode of each primitive, see checkPrimitive
+        trap : Nx6 numpy.ndarray of type numpy.uint32
+                The formatted vertices of each primitive as returned by
+                checkPrimitive.  Rectangles only use the first 4 columns.
+                
+        Description
+        -----------
+        The tests of checkPrimitive are done on all rows at once:
+        1)  Find the edges parallel to the X and Y axis
+        2)  Sort the vertices of the rectangles, X and Y trapezoids
+        3)  Check the 60 degree angle limit of the trapezoids
+        4)  Find the 12, 16 or 20-bit size as in getBitSize
+        A ValueError is raised if any shape fails a test.
+        '''
+        if not isinstance(vertices,np.ndarray):
+            raise TypeError('v3_Pat.batchCheckPrimitive() : Vertices is not of type numpy.ndarray')
+        if vertices.ndim != 2 or not vertices.shape[1] in [4,6,8]:
+            raise ValueError('v3_Pat.batchCheckPrimitive() : The vertices parameter must be an Nx4, Nx6 or Nx8 numpy.ndarray')
+        if not np.all(vertices >= 0):
+            raise ValueError('v3_Pat.batchCheckPrimitive() : The vertices parameter can not be negative')
+        
+        n, size = vertices.shape
+        v = vertices.astype(np.int64)
+        trap = np.zeros((n,6),dtype=np.int64)
+        
+        if size == 4:
+            #The elements of vertices is [X Y W H]
+            isRect = np.ones(n,dtype=bool)
+            isX = isRect
+            trap[:,:4] = v
+        else:
+            #Both bases of a trapezoid or one edge of a triangle are parallel
+            #to the X axis if y changes along exactly 2 edges
+            x = v[:,0::2]
+            y = v[:,1::2]
+            isX = np.sum(y != np.roll(y,1,axis=1),axis=1) == 2
+            isY = np.sum(x != np.roll(x,1,axis=1),axis=1) == 2
+            if not np.all(isX | isY):
+                if size == 8:
+                    raise ValueError('v3_Pat.batchCheckPrimitive : The trapezoid does not have both base parallel to either the X or Y axis')
+                raise ValueError('v3_Pat.batchCheckPrimitive : One edge of the triangle must be parallel to either the X or Y axis')
+            xMin = np.min(x,axis=1)
+            xMax = np.max(x,axis=1)
+            yMin = np.min(y,axis=1)
+            yMax = np.max(y,axis=1)
+            if size == 8:
+                isRect = isX & isY
+                isX = isX & ~isY
+            else:
+                #A right triangle is an X triangle if it is not wider than high
+                isRect = np.zeros(n,dtype=bool)
+                isX = isX & (~isY | (yMax-yMin >= xMax-xMin))
+            
+            #Rectangle
+            trap[isRect,0] = xMin[isRect]
+            trap[isRect,1] = yMin[isRect]
+            trap[isRect,2] = xMax[isRect] - xMin[isRect]
+            trap[isRect,3] = yMax[isRect] - yMin[isRect]
+            isTrap = ~isRect
+            
+            #A repeated vertex cannot be sorted
+            same = np.zeros(n,dtype=bool)
+            for j in range(size/2):
+                for k in range(j+1,size/2):
+                    same |= (x[:,j] == x[:,k]) & (y[:,j] == y[:,k])
+            if np.any(isTrap & same):
+                raise ValueError('v3_Pat.batchCheckPrimitive : The vertices of a trapezoid or triangle must be different')
+            
+            #Sort the vertices, [X1 Y1 X2 X3 X4 Y4] or [X1 Y1 Y2 Y3 X4 Y4]
+            big = np.iinfo(np.int64).max
+            i = isTrap & isX
+            iA = y[i] == yMin[i,None]
+            iB = y[i] == yMax[i,None]
+            trap[i] = np.column_stack((np.min(np.where(iA,x[i],big),axis=1), yMin[i],
+                                       np.max(np.where(iA,x[i],-1),axis=1),
+                                       np.max(np.where(iB,x[i],-1),axis=1),
+                                       np.min(np.where(iB,x[i],big),axis=1), yMax[i]))
+            i = isTrap & ~isX
+            iA = x[i] == xMin[i,None]
+            iB = x[i] == xMax[i,None]
+            trap[i] = np.column_stack((xMin[i], np.min(np.where(iA,y[i],big),axis=1),
+                                       np.max(np.where(iA,y[i],-1),axis=1),
+                                       np.max(np.where(iB,y[i],-1),axis=1),
+                                       xMax[i], np.min(np.where(iB,y[i],big),axis=1)))
+            
+            #Angle limit
+            with np.errstate(divide='ignore', invalid='ignore'):
+                h = np.abs(trap[:,5] - trap[:,1]).astype(np.float)
+                w = np.abs(trap[:,4] - trap[:,0]).astype(np.float)
+                theta1 = np.where(isX, np.arctan(np.abs(trap[:,0]-trap[:,4])/h), np.arctan(np.abs(trap[:,5]-trap[:,1])/w))
+                theta2 = np.where(isX, np.arctan(np.abs(trap[:,2]-trap[:,3])/h), np.arctan(np.abs(trap[:,2]-trap[:,3])/w))
+            shape = 'Trapezoid' if size == 8 else 'Triangle'
+            for theta, name in [(theta1,'Theta1'), (theta2,'Theta2')]:
+                fail = isTrap & ~(theta <= np.pi/3)
+                if np.any(fail & isX):
+                    raise ValueError('v3_Pat.batchCheckPrimitive : X %s %s cannot be larger than 60 degrees' % (shape, name))
+                if np.any(fail):
+                    raise ValueError('v3_Pat.batchCheckPrimitive : Y %s %s cannot be larger than 60 degrees' % (shape, name))
+        
+        #Bit size, 0 = 12-bit, 1 = 16-bit, 2 = 20-bit
+        if np.any(trap >= self._r20_xywh):
+            raise ValueError("v3_Pat.batchCheckPrimitive : The value for the input argument vertices cannot exceed 2^20 (1048576)")
+        if size == 4:
+            small = np.all(trap[:,0:2] < self._r12_xy,axis=1) & np.all(trap[:,2:4] < self._r12_wh,axis=1)
+        else:
+            small = np.where(isRect, np.all(trap[:,0:2] < self._r12_xy,axis=1) & np.all(trap[:,2:4] < self._r12_wh,axis=1),
+                             np.all(trap < self._t12_all,axis=1))
+        bitSize = np.where(small, 0, np.where(np.all(trap < self._r16_x,axis=1), 1, 2))
+        
+        #The longest edge of a rectangle is along the X or Y axis
+        isX = np.where(isRect, trap[:,2] >= trap[:,3], isX)
+        rect = np.array([[self.cRectXS,self.cRectXM,self.cRectXL],[self.cRectYS,self.cRectYM,self.cRectYL]],dtype=np.int64)
+        trapezoid = np.array([[self.cTrapXS,self.cTrapXM,self.cTrapXL],[self.cTrapYS,self.cTrapYM,self.cTrapYL]],dtype=np.int64)
+        orientation = np.where(isX, 0, 1)
+        cType = np.where(isRect, rect[orientation,bitSize], trapezoid[orientation,bitSize])
+        return cType, trap.astype(np.uint32)
+
     @property
     def c12(self):
         return self._c12
@@ -599,11 +743,7 @@ class v3_Pat(v3):
 
     @rectXS.setter
     def rectXS(self,vertices):
-        if self._rectXSIndex == self._rectXS.shape[0]:
-            self._rectXS = np.append(self._rectXS,np.zeros((self._verticesBuffer,4),dtype=np.uint16),axis=0)
-        self._rectXS[self._rectXSIndex] = vertices
-        self._rectXSIndex += 1
-        self.numRect += 1
+        self.appendPrimitive(self.cRectXS, vertices)
 
     @property
     def rectXM(self):
@@ -615,11 +755,7 @@ class v3_Pat(v3):
 
     @rectXM.setter
     def rectXM(self,vertices):
-        if self._rectXMIndex == self._rectXM.shape[0]:
-            self._rectXM = np.append(self._rectXM,np.zeros((self._verticesBuffer,4),dtype=np.uint16),axis=0)        
-        self._rectXM[self._rectXMIndex] = vertices
-        self._rectXMIndex += 1
-        self.numRect += 1
+        self.appendPrimitive(self.cRectXM, vertices)
 
     @property
     def rectXL(self):
@@ -631,11 +767,7 @@ class v3_Pat(v3):
 
     @rectXL.setter
     def rectXL(self,vertices):
-        if self._rectXLIndex == self._rectXL.shape[0]:
-            self._rectXL = np.append(self._rectXL,np.zeros((self._verticesBuffer,4),dtype=np.uint32),axis=0)        
-        self._rectXL[self._rectXLIndex] = vertices
-        self._rectXLIndex += 1
-        self.numRect += 1
+        self.appendPrimitive(self.cRectXL, vertices)
 
     @property
     def rectYS(self):
@@ -647,11 +779,7 @@ class v3_Pat(v3):
 
     @rectYS.setter
     def rectYS(self,vertices):
-        if self._rectYSIndex == self._rectYS.shape[0]:
-            self._rectYS = np.append(self._rectYS,np.zeros((self._verticesBuffer,4),dtype=np.uint16),axis=0)        
-        self._rectYS[self._rectYSIndex] = vertices
-        self._rectYSIndex += 1
-        self.numRect += 1
+        self.appendPrimitive(self.cRectYS, vertices)
 
     @property
     def rectYM(self):
@@ -663,11 +791,7 @@ class v3_Pat(v3):
 
     @rectYM.setter
     def rectYM(self,vertices):
-        if self._rectYMIndex == self._rectYM.shape[0]:
-            self._rectYM = np.append(self._rectYM,np.zeros((self._verticesBuffer,4),dtype=np.uint16),axis=0)    
-        self._rectYM[self._rectYMIndex] = vertices
-        self._rectYMIndex += 1
-        self.numRect += 1
+        self.appendPrimitive(self.cRectYM, vertices)
 
     @property
     def rectYL(self):
@@ -679,11 +803,7 @@ class v3_Pat(v3):
 
     @rectYL.setter
     def rectYL(self,vertices):
-        if self._rectYLIndex == self._rectYL.shape[0]:
-            self._rectYL = np.append(self._rectYL,np.zeros((self._verticesBuffer,4),dtype=np.uint32),axis=0)    
-        self._rectYL[self._rectYLIndex] = vertices
-        self._rectYLIndex += 1
-        self.numRect += 1
+        self.appendPrimitive(self.cRectYL, vertices)
     
     @property
     def trapXS(self):
@@ -695,11 +815,7 @@ class v3_Pat(v3):
 
     @trapXS.setter
     def trapXS(self,vertices):
-        if self._trapXSIndex == self._trapXS.shape[0]:
-            self._trapXS = np.append(self._trapXS,np.zeros((self._verticesBuffer,6),dtype=np.uint16),axis=0)        
-        self._trapXS[self._trapXSIndex] = vertices
-        self._trapXSIndex += 1
-        self.numTrap += 1
+        self.appendPrimitive(self.cTrapXS, vertices)
 
     @property
     def trapXM(self):
@@ -711,11 +827,7 @@ class v3_Pat(v3):
 
     @trapXM.setter
     def trapXM(self,vertices):
-        if self._trapXMIndex == self._trapXM.shape[0]:
-            self._trapXM = np.append(self._trapXM,np.zeros((self._verticesBuffer,6),dtype=np.uint16),axis=0)        
-        self._trapXM[self._trapXMIndex] = vertices
-        self._trapXMIndex += 1
-        self.numTrap += 1
+        self.appendPrimitive(self.cTrapXM, vertices)
 
     @property
     def trapXL(self):
@@ -727,11 +839,7 @@ class v3_Pat(v3):
 
     @trapXL.setter
     def trapXL(self,vertices):
-        if self._trapXLIndex == self._trapXL.shape[0]:
-            self._trapXL = np.append(self._trapXL,np.zeros((self._verticesBuffer,6),dtype=np.uint32),axis=0)        
-        self._trapXL[self._trapXLIndex] = vertices
-        self._trapXLIndex += 1
-        self.numTrap += 1
+        self.appendPrimitive(self.cTrapXL, vertices)
 
     @property
     def trapYS(self):
@@ -743,11 +851,7 @@ class v3_Pat(v3):
 
     @trapYS.setter
     def trapYS(self,vertices):
-        if self._trapYSIndex == self._trapYS.shape[0]:
-            self._trapYS = np.append(self._trapYS,np.zeros((self._verticesBuffer,6),dtype=np.uint16),axis=0)        
-        self._trapYS[self._trapYSIndex] = vertices
-        self._trapYSIndex += 1
-        self.numTrap += 1
+        self.appendPrimitive(self.cTrapYS, vertices)
 
     @property
     def trapYM(self):
@@ -759,11 +863,7 @@ class v3_Pat(v3):
 
     @trapYM.setter
     def trapYM(self,vertices):
-        if self._trapYMIndex == self._trapYM.shape[0]:
-            self._trapYM = np.append(self._trapYM,np.zeros((self._verticesBuffer,6),dtype=np.uint16),axis=0)        
-        self._trapYM[self._trapYMIndex] = vertices
-        self._trapYMIndex += 1
-        self.numTrap += 1
+        self.appendPrimitive(self.cTrapYM, vertices)
 
     @property
     def trapYL(self):
@@ -775,11 +875,7 @@ class v3_Pat(v3):
 
     @trapYL.setter
     def trapYL(self,vertices):
-        if self._trapYLIndex == self._trapYL.shape[0]:
-            self._trapYL = np.append(self._trapYL,np.zeros((self._verticesBuffer,6),dtype=np.uint32),axis=0)    
-        self._trapYL[self._trapYLIndex] = vertices
-        self._trapYLIndex += 1
-        self.numTrap += 1
+        self.appendPrimitive(self.cTrapYL, vertices)
 
     @property
     def rectXSIndex(self):
@@ -897,36 +993,67 @@ class v3_Pat(v3):
         '''
         if shotRank >= 0:    self.shotRank = shotRank
 
-        for i in vertices:
-            cType,trap = self.checkPrimitive(i)
-            if   cType is self.cRectXS:
-                self.rectXS = trap
-            elif cType is self.cRectXM:
-                self.rectXM = trap
-            elif cType is self.cRectXL:
-                self.rectXL = trap
-            elif cType is self.cRectYS:
-                self.rectYS = trap
-            elif cType is self.cRectYM:
-                self.rectYM = trap
-            elif cType is self.cRectYL:
-                self.rectYL = trap
-            elif cType is self.cTrapXS:
-                self.trapXS = trap
-            elif cType is self.cTrapXM:
-                self.trapXM = trap
-            elif cType is self.cTrapXL:
-                self.trapXL = trap
-            elif cType is self.cTrapYS:
-                self.trapYS = trap
-            elif cType is self.cTrapYM:
-                self.trapYM = trap
-            elif cType is self.cTrapYL:
-                self.trapYL = trap
+        #Classify the shapes of each size with batchCheckPrimitive
+        if isinstance(vertices,np.ndarray) and vertices.ndim == 2:
+            cType, trap = self.batchCheckPrimitive(vertices)
+        else:
+            size = np.array([np.size(i) for i in vertices],dtype=np.int64)
+            if not np.all(np.in1d(size,[4,6,8])):
+                raise ValueError('v3_Pat.addPattern() : The vertices parameter must contain 4, 6, or 8 elements')
+            cType = np.zeros(size.size,dtype=np.int64)
+            trap = np.zeros((size.size,6),dtype=np.uint32)
+            for j in [4,6,8]:
+                index = np.flatnonzero(size == j)
+                if index.size > 0:
+                    cType[index], trap[index] = self.batchCheckPrimitive(np.array([vertices[i] for i in index]).reshape(-1,j))
+        
+        #Store the shapes by type in the order they were added
+        for i in np.unique(cType):
+            self.appendPrimitive(i, trap[cType == i])
         
         self.numDecRect = self.numRect*self.nX*self.nY
         self.numDecTrap = self.numTrap*self.nX*self.nY
 
+    def appendPrimitive(self, cType, trap):
+        '''
+        appendPrimitive(cType, trap)
+        
+        Appends primitives of one type
+        
+        Parameters
+        ----------
+        cType : integer
+                The opcode of the primitives, see checkPrimitive
+        trap : Nx4 or Nx6 numpy.ndarray
+                The formatted vertices of the primitives as returned by
+                checkPrimitive or batchCheckPrimitive.  Only the first 4
+                columns are used for rectangles.
+                
+        Description
+        -----------
+        The array of the primitive type at least doubles in size when it is
+        full, so appending N primitives one at a time copies O(N) rows.
+        numRect or numTrap is updated once.
+        '''
+        if not cType in self._primitiveName:
+            raise ValueError('v3_Pat.appendPrimitive() : The cType parameter must be the opcode of a rectangle or trapezoid')
+        name = '_' + self._primitiveName[cType]
+        data = getattr(self, name)
+        index = getattr(self, name + 'Index')
+        trap = np.reshape(trap, (-1, np.shape(trap)[-1]))[:,:data.shape[1]]
+        n = trap.shape[0]
+        if index + n > data.shape[0]:
+            tmp = np.zeros((max(2*data.shape[0], index+n), data.shape[1]), dtype=data.dtype)
+            tmp[:index] = data[:index]
+            data = tmp
+            setattr(self, name, data)
+        data[index:index+n] = trap
+        setattr(self, name + 'Index', index+n)
+        if data.shape[1] == 4:
+            self.numRect += n
+        else:
+            self.numTrap += n
+
     def setPatternArray(self, pX, pY, nX, nY):
         '''
         setPatternArray(pX,pY,nX,nY)
@@ -970,15 +1097,16 @@ class v3_Pat(v3):
         -----------
         The block parameter appends its set value
         The block parameter is a dynamically growing array
-            The block parameter will grow by self._blockBuffer when appending
-            the set value will result in overflow
+            The block parameter will at least double in size, in multiples of
+            self._blockBuffer, when appending the set value will result in
+            overflow
         '''
         return self._block
     
     @block.setter
     def block(self,val):
         if self._blockIndex + val.size >= self._block.size:
-            nBuffer = int(np.ceil(float(val.size)/float(self._blockBuffer)))
+            nBuffer = int(np.ceil(float(max(val.size,self._block.size))/float(self._blockBuffer)))
             self._block = np.append(self._block,np.zeros(self._blockBuffer*nBuffer,dtype=np.uint8),axis=0)
         self._block[self._blockIndex:self._blockIndex+val.size] = val
         self._blockIndex += val.size
@@ -1016,6 +1144,17 @@ class v3_Pat(v3):
         '''
         self._block = np.delete(self._block,np.s_[self._blockIndex::],0)
 
+    def clearBlock(self):
+        '''
+        clearBlock()
+        
+        Releases the binary data of this pattern after it has been
+        added to a record
+        '''
+        self._block = np.zeros(self._blockBuffer,dtype=np.uint8)
+        self._blockIndex = 0
+        self._blockSectionIndex = [0]
+
     @property
     def positionSetX(self):
         '''
@@ -1164,9 +1303,24 @@ class v3_Pat(v3):
     def sMax(self):
         return self._sMax
 
-    def blockFracture(self,offset,cType):
+    @property
+    def exactPacking(self):
+        '''
+        exactPacking : boolean
+            False   :   A record is ended when the largest opcode (sMax) may
+                        not fit
+            True    :   A record is ended only when the next opcode and its
+                        parameters (sByte) do not fit
         '''
-        blockFracture(offset,cType)
+        return self._exactPacking
+        
+    @exactPacking.setter
+    def exactPacking(self, val):
+        self._exactPacking = bool(val)
+
+    def blockFracture(self,offset,cType,sByte=None):
+        '''
+        blockFracture(offset,cType,sByte=None)
         
         Determines if the block should be fractured to fit in a record
         
@@ -1176,6 +1330,10 @@ class v3_Pat(v3):
         
         cType : string
         
+        sByte : integer or None
+            The number of bytes of the next item including a cRecordEnd
+            None    :   Use sMax
+        
         Returns
         -------
         offset : integer from 0 to 4096
@@ -1186,20 +1344,108 @@ class v3_Pat(v3):
             
         Note
         -----------
-        This function could be improved to better fill a block by using the
-        actual length of each opCode instead of the maximum length of all
-        opCodes (sMax).
+        By default the maximum length of all opCodes (sMax) is reserved
+        before each item.  With exactPacking the actual length of the next
+        item (sByte) is used instead, so that the offset must be the exact
+        position in the record.
         '''
 
-        if self.maxRecordSize < offset + self.sMax:
+        if sByte is None or not self.exactPacking:
+            sByte = self.sMax
+        if self.maxRecordSize < offset + sByte:
             self.block = self.dec2bin(self.cRecordEnd)
             self.blockSectionIndex = self.blockIndex
-            if not (cType is self.cShotRank or cType is self.cPatternCompactionMode8):
+            if not cType in [self.cPositionSet, self.cShotRank, self.cPatternCompactionMode8]:
                 self.block = self.dec2bin(cType)
-            offset = 0
+            offset = 6     #TX identifier, number of data and chain data
             return offset, True
         return offset, False
 
+    def encodePrimitive(self, cType):
+        '''
+        encodePrimitive(cType)
+        
+        Returns the binary representation of all primitives of one type
+        
+        Parameters
+        ----------
+        cType : integer
+            The opcode of the primitives, see checkPrimitive
+            
+        Returns
+        -------
+        data : Nxd numpy.ndarray of type numpy.uint8
+            Row i contains the d bytes of the parameters of primitive i
+            
+        Description
+        -----------
+        The parameters are converted as a whole instead of one value at a
+        time with dec2bin.  The middle-endian ordering of dec2bin is a
+        little-endian 16-bit word, and a 32-bit value is stored as its high
+        word followed by its low word.
+        '''
+        name = self._primitiveName[cType]
+        data = getattr(self, name)[:getattr(self, name + 'Index')]
+        if cType in [self.cRectXL, self.cRectYL, self.cTrapXL, self.cTrapYL]:
+            data = data.astype(np.uint32)
+            word = np.empty(data.shape + (2,), dtype='<u2')
+            word[...,0] = data >> 16
+            word[...,1] = data & 0xFFFF
+        else:
+            word = data.astype('<u2')
+        return word.view(np.uint8).reshape(data.shape[0], -1)
+        
+    def genPrimitiveBlock(self, offset, cType):
+        '''
+        genPrimitiveBlock(offset, cType)
+        
+        Generates the binary pattern data of all primitives of one type
+        
+        Parameters
+        ----------
+        offset : integer from 0 to 4096
+            The position in a record
+        cType : integer
+            The opcode of the primitives, see checkPrimitive
+            
+        Results
+        -------
+        offset : integer from 0 to 4096
+            The position in a record after adding the primitives
+            
+        Description
+        -----------
+        The primitives are encoded by encodePrimitive.  blockFracture starts
+        a new record when fewer than sMax bytes are left before a primitive,
+        so the number of primitives that fit in the current record is
+        computed from the offset and the rows are added to the block in
+        one piece per record.  With exactPacking a record is filled up to
+        the cRecordEnd.
+        '''
+        n = getattr(self, self._primitiveName[cType] + 'Index')
+        if n == 0:
+            return offset
+        data = self.encodePrimitive(cType)
+        d = data.shape[1]
+        offset, reset = self.blockFracture(offset,cType,d+4)
+        if not reset:
+            self.block = self.dec2bin(cType)
+        offset += 2
+        i = 0
+        while i < n:
+            if i > 0:
+                offset, reset = self.blockFracture(offset,cType,d+2)
+                if reset and self.exactPacking:
+                    offset += 2
+            if self.exactPacking:
+                k = min(n-i, (self.maxRecordSize - 2 - offset)//d)
+            else:
+                k = min(n-i, 1 + max(0, (self.maxRecordSize - self.sMax - offset)//d))
+            self.block = data[i:i+k].ravel()
+            offset += k*d
+            i += k
+        return offset
+
     def genRecord(self,offset=0):
         '''
         genRecord(offset=0)
@@ -1238,14 +1484,14 @@ class v3_Pat(v3):
 
         #Position Set
         if self.positionSetX >= 0 and self.positionSetY >= 0:
-            offset, reset = self.blockFracture(offset,self.cPositionSet)
+            offset, reset = self.blockFracture(offset,self.cPositionSet,self.sPositionSet+2)
             self.block = self.dec2bin(self.cPositionSet)
             self.block = self.dec2bin(self.positionSetX,4)
             self.block = self.dec2bin(self.positionSetY,4)
             offset += self.sPositionSet
         
         #Shot rank value
-        offset, reset = self.blockFracture(offset,self.cShotRank)
+        offset, reset = self.blockFracture(offset,self.cShotRank,self.sShotRank+2)
         if self.shotRank >= 0:
             self.block = self.dec2bin(self.cShotRank)
             self.block = self.dec2bin(self.shotRank)
@@ -1256,7 +1502,7 @@ class v3_Pat(v3):
             self.nPat = self.numRect + self.numTrap
             self.numDecRect = self.numRect*self.nX*self.nY
             self.numDecTrap = self.numTrap*self.nX*self.nY
-            offset, reset = self.blockFracture(offset,self.cPatternCompactionMode8)
+            offset, reset = self.blockFracture(offset,self.cPatternCompactionMode8,self.sPatternCompactionMode8+2)
             self.block = self.dec2bin(self.cPatternCompactionMode8)
             self.block = self.dec2bin(self.nPat)
             self.block = self.dec2bin(self.lX,4)
@@ -1266,174 +1512,9 @@ class v3_Pat(v3):
             offset += self.sPatternCompactionMode8
             
         #Shapes
-        if self.rectXSIndex > 0:
-            offset, reset = self.blockFracture(offset,self.cRectXS)
-            if not reset:
-                self.block = self.dec2bin(self.cRectXS)
-            offset += 2
-            for i in range(self.rectXSIndex):
-                if i > 0:
-                    offset, reset = self.blockFracture(offset,self.cRectXS)
-                self.block = np.array([self.dec2bin(self.rectXS[i,0]),
-                        self.dec2bin(self.rectXS[i,1]),
-                        self.dec2bin(self.rectXS[i,2]),
-                        self.dec2bin(self.rectXS[i,3])],dtype=np.uint8).ravel()
-                offset += self.dRectSM
-        if self.rectXMIndex > 0:
-            offset, reset = self.blockFracture(offset,self.cRectXM)
-            if not reset:
-                self.block = self.dec2bin(self.cRectXM)
-            offset += 2
-            for i in range(self.rectXMIndex):
-                if i > 0:
-                    offset, reset = self.blockFracture(offset,self.cRectXM)
-                self.block = np.array([self.dec2bin(self.rectXM[i,0]),
-                        self.dec2bin(self.rectXM[i,1]),
-                        self.dec2bin(self.rectXM[i,2]),
-                        self.dec2bin(self.rectXM[i,3])],dtype=np.uint8).ravel()
-                offset += self.dRectSM
-        if self.rectXLIndex > 0:
-            offset, reset = self.blockFracture(offset,self.cRectXL)
-            if not reset:
-                self.block = self.dec2bin(self.cRectXL)
-            offset += 2
-            for i in range(self.rectXLIndex):
-                if i > 0:
-                    offset, reset = self.blockFracture(offset,self.cRectXL)
-                self.block = np.array([self.dec2bin(self.rectXL[i,0],4),
-                        self.dec2bin(self.rectXL[i,1],4),
-                        self.dec2bin(self.rectXL[i,2],4),
-                        self.dec2bin(self.rectXL[i,3],4)],dtype=np.uint8).ravel()
-                offset += self.dRectL
-        if self.rectYSIndex > 0:
-            offset, reset = self.blockFracture(offset,self.cRectYS)
-            if not reset:
-                self.block = self.dec2bin(self.cRectYS)
-            offset += 2
-            for i in range(self.rectYSIndex):
-                if i > 0:
-                    offset, reset = self.blockFracture(offset,self.cRectYS)
-                self.block = np.array([self.dec2bin(self.rectYS[i,0]),
-                        self.dec2bin(self.rectYS[i,1]),
-                        self.dec2bin(self.rectYS[i,2]),
-                        self.dec2bin(self.rectYS[i,3])],dtype=np.uint8).ravel()
-                offset += self.dRectSM
-        if self.rectYMIndex > 0:
-            offset, reset = self.blockFracture(offset,self.cRectYM)
-            if not reset:
-                self.block = self.dec2bin(self.cRectYM)
-            offset += 2
-            for i in range(self.rectYMIndex):
-                if i > 0:
-                    offset, reset = self.blockFracture(offset,self.cRectYM)
-                self.block = np.array([self.dec2bin(self.rectYM[i,0]),
-                        self.dec2bin(self.rectYM[i,1]),
-                        self.dec2bin(self.rectYM[i,2]),
-                        self.dec2bin(self.rectYM[i,3])],dtype=np.uint8).ravel()
-                offset += self.dRectSM
-        if self.rectYLIndex > 0:
-            offset, reset = self.blockFracture(offset,self.cRectYL)
-            if not reset:
-                self.block = self.dec2bin(self.cRectYL)
-            offset += 2
-            for i in range(self.rectYLIndex):
-                if i > 0:
-                    offset, reset = self.blockFracture(offset,self.cRectYL)
-                self.block = np.array([self.dec2bin(self.rectYL[i,0],4),
-                        self.dec2bin(self.rectYL[i,1],4),
-                        self.dec2bin(self.rectYL[i,2],4),
-                        self.dec2bin(self.rectYL[i,3],4)],dtype=np.uint8).ravel()
-                offset += self.dRectL
-        if self.trapXSIndex > 0:
-            offset, reset = self.blockFracture(offset,self.cTrapXS)
-            if not reset:
-                self.block = self.dec2bin(self.cTrapXS)
-            offset += 2
-            for i in range(self.trapXSIndex):
-                if i > 0:
-                    offset, reset = self.blockFracture(offset,self.cTrapXS)
-                self.block = np.array([self.dec2bin(self.trapXS[i,0]),
-                        self.dec2bin(self.trapXS[i,1]),
-                        self.dec2bin(self.trapXS[i,2]),
-                        self.dec2bin(self.trapXS[i,3]),
-                        self.dec2bin(self.trapXS[i,4]),
-                        self.dec2bin(self.trapXS[i,5])],dtype=np.uint8).ravel()
-                offset += self.dTrapSM
-        if self.trapXMIndex > 0:
-            offset, reset = self.blockFracture(offset,self.cTrapXM)
-            if not reset:
-                self.block = self.dec2bin(self.cTrapXM)
-            offset += 2
-            for i in range(self.trapXMIndex):
-                if i > 0:
-                    offset, reset = self.blockFracture(offset,self.cTrapXM)
-                self.block = np.array([self.dec2bin(self.trapXM[i,0]),
-                        self.dec2bin(self.trapXM[i,1]),
-                        self.dec2bin(self.trapXM[i,2]),
-                        self.dec2bin(self.trapXM[i,3]),
-                        self.dec2bin(self.trapXM[i,4]),
-                        self.dec2bin(self.trapXM[i,5])],dtype=np.uint8).ravel()
-                offset += self.dTrapSM
-        if self.trapXLIndex > 0:
-            offset, reset = self.blockFracture(offset,self.cTrapXL)
-            if not reset:
-                self.block = self.dec2bin(self.cTrapXL)
-            offset += 2
-            for i in range(self.trapXLIndex):
-                if i > 0:
-                    offset, reset = self.blockFracture(offset,self.cTrapXL)
-                self.block = np.array([self.dec2bin(self.trapXL[i,0],4),
-                        self.dec2bin(self.trapXL[i,1],4),
-                        self.dec2bin(self.trapXL[i,2],4),
-                        self.dec2bin(self.trapXL[i,3],4),
-                        self.dec2bin(self.trapXL[i,4],4),
-                        self.dec2bin(self.trapXL[i,5],4)],dtype=np.uint8).ravel()
-                offset += self.dTrapL
-        if self.trapYSIndex > 0:
-            offset, reset = self.blockFracture(offset,self.cTrapYS)
-            if not reset:
-                self.block = self.dec2bin(self.cTrapYS)
-            offset += 2
-            for i in range(self.trapYSIndex):
-                if i > 0:
-                    offset, reset = self.blockFracture(offset,self.cTrapYS)
-                self.block = np.array([self.dec2bin(self.trapYS[i,0]),
-                        self.dec2bin(self.trapYS[i,1]),
-                        self.dec2bin(self.trapYS[i,2]),
-                        self.dec2bin(self.trapYS[i,3]),
-                        self.dec2bin(self.trapYS[i,4]),
-                        self.dec2bin(self.trapYS[i,5])],dtype=np.uint8).ravel()
-                offset += self.dTrapSM
-        if self.trapYMIndex > 0:
-            offset, reset = self.blockFracture(offset,self.cTrapYM)
-            if not reset:
-                self.block = self.dec2bin(self.cTrapYM)
-            offset += 2
-            for i in range(self.trapYMIndex):
-                if i > 0:
-                    offset, reset = self.blockFracture(offset,self.cTrapYM)
-                self.block = np.array([self.dec2bin(self.trapYM[i,0]),
-                        self.dec2bin(self.trapYM[i,1]),
-                        self.dec2bin(self.trapYM[i,2]),
-                        self.dec2bin(self.trapYM[i,3]),
-                        self.dec2bin(self.trapYM[i,4]),
-                        self.dec2bin(self.trapYM[i,5])],dtype=np.uint8).ravel()
-                offset += self.dTrapSM
-        if self.trapYLIndex > 0:
-            offset, reset = self.blockFracture(offset,self.cTrapYL)
-            if not reset:
-                self.block = self.dec2bin(self.cTrapYL)
-            offset += 2
-            for i in range(self.trapYLIndex):
-                if i > 0:
-                    offset, reset = self.blockFracture(offset,self.cTrapYL)
-                self.block = np.array([self.dec2bin(self.trapYL[i,0],4),
-                        self.dec2bin(self.trapYL[i,1],4),
-                        self.dec2bin(self.trapYL[i,2],4),
-                        self.dec2bin(self.trapYL[i,3],4),
-                        self.dec2bin(self.trapYL[i,4],4),
-                        self.dec2bin(self.trapYL[i,5],4)],dtype=np.uint8).ravel()
-                offset += self.dTrapL
+        for cType in [self.cRectXS, self.cRectXM, self.cRectXL, self.cRectYS, self.cRectYM, self.cRectYL,
+                      self.cTrapXS, self.cTrapXM, self.cTrapXL, self.cTrapYS, self.cTrapYM, self.cTrapYL]:
+            offset = self.genPrimitiveBlock(offset, cType)
         self.clipBlock()
         return offset
    
@@ -1477,5 +1558,89 @@ def test():
     print a.block[a.blockSectionIndex[0]:a.blockSectionIndex[1]]
     print a.block[a.blockSectionIndex[1]:]
 
+def benchmark(nShape = [1000, 10000, 100000]):
+    '''
+    benchmark(nShape = [1000, 10000, 100000])
+    
+    Compares checkPrimitive on each shape with batchCheckPrimitive on all
+    shapes at once
+    
+    Parameters
+    ----------
+    nShape : list of integers
+        Number of random trapezoids
+    '''
+    import time
+    a = v3_Pat()
+    np.random.seed(0)
+    print 'Shapes    checkPrimitive[s]   batchCheckPrimitive[s]'
+    for n in nShape:
+        x1, x2 = np.random.randint(0,30000,(2,n))
+        y1, y2 = np.random.randint(0,30000,(2,n))
+        x2 += x1 + 300
+        y2 += y1 + 200
+        d1, d2 = np.random.randint(0,100,(2,n))
+        v = np.column_stack((x1,y1,x2,y1,x2-d2,y2,x1+d1,y2))
+        start = time.time()
+        for i in v:
+            a.checkPrimitive(i)
+        t = time.time() - start
+        start = time.time()
+        a.batchCheckPrimitive(v)
+        print '%-8d  %-17.3f   %.3f' % (n, t, time.time()-start)
+
+def benchmarkAppend(nShape = [10000, 100000, 1000000]):
+    '''
+    benchmarkAppend(nShape = [10000, 100000, 1000000])
+    
+    Times adding random rectangles to one field, the text block of a single
+    field, with one call of v3_TXB.addPattern and with the rectXM setter
+    
+    Parameters
+    ----------
+    nShape : list of integers
+        Number of rectangles
+    '''
+    import time
+    from v3_TXB import v3_TXB
+    np.random.seed(0)
+    print 'Shapes     addPattern[s]   setter[s]   numRect'
+    for n in nShape:
+        v = np.column_stack((np.random.randint(0,60000,(n,2)),np.random.randint(1,500,(n,2))))
+        a = v3_TXB()
+        start = time.time()
+        a.addPattern(v, 1)
+        t = time.time() - start
+        b = v3_Pat()
+        start = time.time()
+        for i in v:
+            b.rectXM = i
+        print '%-9d  %-13.3f   %-9.3f   %d' % (n, t, time.time()-start, a.numRect)
+
+def benchmarkRecord(nShape = [10000, 100000, 1000000]):
+    '''
+    benchmarkRecord(nShape = [10000, 100000, 1000000])
+    
+    Times genRecord on random rectangles and X trapezoids, most of them
+    of the 16-bit and 20-bit sizes
+    
+    Parameters
+    ----------
+    nShape : list of integers
+        Number of rectangles and of trapezoids
+    '''
+    import time
+    np.random.seed(0)
+    print 'Shapes     genRecord[s]   Bytes      Records'
+    for n in nShape:
+        a = v3_Pat()
+        a.addPattern(np.column_stack((np.random.randint(0,60000,(n,2)),np.random.randint(1,500,(n,2)))), 1)
+        x = np.random.randint(0,1000000,n)
+        y = np.random.randint(0,1000000,n)
+        a.addPattern(np.column_stack((x,y,x+40000,y,x+30000,y+20000,x+10000,y+20000)))
+        start = time.time()
+        a.genRecord(0)
+        print '%-9d  %-12.3f   %-9d  %d' % (n, time.time()-start, a.block.size, len(a.blockSectionIndex))
+
 if __name__ == '__main__':
     test()
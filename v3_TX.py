@@ -20,7 +20,10 @@ class v3_TX(v3):
     
     The following functions are supported:
        addTextBlock:        Adds a TX block
+       genTextBlock:        Adds the binary of one TX block to the record
+       endRecord:           Ends the TX record binary with a chip end
        genRecord:           Generates TX record binary
+       validateRecord:      Parses a TX record binary and checks its structure
     
     Long Chang, UH, May 2013
     '''
@@ -31,6 +34,8 @@ class v3_TX(v3):
         self._record = np.zeros(self._maxRecordSize,dtype=np.uint8)
         self._record[0:2] = np.array([ord(i) for i in self._identifier],dtype=np.uint8)    
         self._recordIndex = 4
+        self._recordList = []
+        self._stream = None
         self._numTextRecord = 1
         self._numTextBlock = 0
         self._blockBuffer = 100
@@ -41,6 +46,7 @@ class v3_TX(v3):
         self._chainData = 0
         self._textBlock = []
         self._numData = 0
+        self._exactPacking = False
 
         self._cChipEnd = 0xFFF5
         self._cRecordEnd = 0xFFF2
@@ -62,6 +68,21 @@ class v3_TX(v3):
     def sMax(self):
         return self._sMax
 
+    @property
+    def exactPacking(self):
+        '''
+        exactPacking : boolean
+            False   :   A record is ended when the largest opcode (sMax) may
+                        not fit, see v3_Pat.blockFracture
+            True    :   A record is ended only when the next opcode and its
+                        parameters do not fit, so that records are filled
+        '''
+        return self._exactPacking
+        
+    @exactPacking.setter
+    def exactPacking(self, val):
+        self._exactPacking = bool(val)
+
     @property
     def cRecordEnd(self):
         return self._cRecordEnd
@@ -208,31 +229,64 @@ class v3_TX(v3):
         
     @property
     def recordIndex(self):
+        '''
+        recordIndex : integer from 4 to 4096
+            A pointer to the next available position in the current record
+        '''
         return self._recordIndex
+        
+    @property
+    def stream(self):
+        '''
+        stream : file object or None
+            None    :   Completed records are kept in memory
+            file    :   Completed records are written to the file as soon as
+                        the next record is started
+        '''
+        return self._stream
+        
+    @stream.setter
+    def stream(self, val):
+        self._stream = val
 
     @property
     def record(self):
-        return self._record
+        '''
+        record : numpy.ndarray of type numpy.uint8
+            The binary text records that have not been written to the stream,
+            or the last record after endRecord with a stream
+            
+        Description
+        -----------
+        The record parameter appends its set value, a block that ends with
+        a record end or a field end, preceded by its chain data.
+        The completed records are stored in a list and are joined when the
+        record parameter is read, so that starting a new record does not
+        copy the previous records.
+        '''
+        if len(self._recordList) == 0:
+            return self._record
+        return np.concatenate(self._recordList + [self._record])
         
     @record.setter
     def record(self,block):
-        if self.recordIndex + block.size >= self._record.size:
-            if not all(self._record[self.recordIndex-2:self.recordIndex] == self.dec2bin(self.cRecordEnd)):
+        #A new record starts after a record end or when the block does not fit
+        #A block that does not end with a record end leaves room for the
+        #chain data and record end that close the record
+        recordEnd = all(self._record[self.recordIndex-2:self.recordIndex] == self.dec2bin(self.cRecordEnd))
+        reserve = 0 if all(block[-2:] == self.dec2bin(self.cRecordEnd)) else 4
+        if self.recordIndex + block.size + reserve >= self._record.size or recordEnd:
+            if not recordEnd:
                 self._record[self.recordIndex:self.recordIndex+2] = self.dec2bin(1)
                 self._record[self.recordIndex+2:self.recordIndex+4] = self.dec2bin(self._cRecordEnd)
-            self._record = np.append(self._record,np.zeros(self._maxRecordSize,dtype=np.uint8),axis=0)
-            #recordIndex points to beginning of new record
-            self._recordIndex = self._record.size-self._maxRecordSize
-            #Add the 'TX' identifier
-            self._record[self.recordIndex:self.recordIndex+2] = np.array([ord(i) for i in self.identifier],dtype=np.uint8)
-            self._recordIndex += 2
+                self.numData += 1
             #Update the number of data
             self._record[self.aNumData] = self.dec2bin(self.numData)
             self.numData = 0
-            #Add the number of data
-            self._record[self.recordIndex:self.recordIndex+2] = np.array([0,0],dtype=np.uint8)
-            self._aNumData = [self.recordIndex,self.recordIndex+1]
-            self._recordIndex += 2
+            self.flushRecord()
+            #Add the 'TX' identifier, the number of data is added at the end of the record
+            self._record[0:2] = np.array([ord(i) for i in self.identifier],dtype=np.uint8)
+            self._recordIndex = 4
             self._numTextRecord += 1
         #Adds chain data to the record
         self.chainData = block.size/2
@@ -243,6 +297,71 @@ class v3_TX(v3):
         self._recordIndex += block.size
         self.numData += 1
 
+    def flushRecord(self):
+        '''
+        flushRecord()
+        
+        Moves the current record to the stream, or to the list of completed
+        records if there is no stream, and starts an empty record
+        '''
+        if self.stream is None:
+            self._recordList.append(self._record)
+        else:
+            self.stream.write(self._record)
+        self._record = np.zeros(self._maxRecordSize,dtype=np.uint8)
+        self._recordIndex = 0
+        
+    def genTextBlock(self, textBlock):
+        '''
+        genTextBlock(textBlock)
+        
+        Adds the binary text block to the text record
+        
+        Parameters
+        ----------
+        textBlock : v3_TXB
+        
+        Description
+        -----------
+        The text block is generated at the current position in the record
+        and its sections are added to the record.  With exactPacking, the
+        offset given to the text block includes the chain data of its first
+        section.
+        '''
+        textBlock.exactPacking = self.exactPacking
+        if self.exactPacking:
+            textBlock.genRecord(self.recordIndex%self.maxRecordSize + 2)
+        else:
+            textBlock.genRecord(self.recordIndex%self.maxRecordSize)
+        tmp = textBlock.blockSectionIndex
+        tmp.append(textBlock.block.size)
+        for j in range(0,len(tmp)-1):
+            self.record = textBlock.block[tmp[j]:tmp[j+1]]
+            
+    def endRecord(self):
+        '''
+        endRecord()
+        
+        Ends the text record
+        
+        Description
+        -----------
+        The final field end is changed to a chip end and a record end is
+        added.  If there is a stream, the last record is written to it and
+        is kept as the record.
+        '''
+        #The final Field End is changed to a Chip End
+        self._record[self._recordIndex-2:self._recordIndex] = self.dec2bin(self.cChipEnd)
+        
+        #Adds a record end
+        self.record = self.dec2bin(self.cRecordEnd)
+        
+        #Update the number of data for the last text block
+        self._record[self.aNumData] = self.dec2bin(self.numData)
+        
+        if not self.stream is None:
+            self.stream.write(self._record)
+
     def genRecord(self):
         '''
         genRecord()
@@ -259,23 +378,123 @@ class v3_TX(v3):
         A '*' means that the block appears one or more times
         '''
         for i in self.textBlock:
-            if i.fieldPositionX == 1000000 and i.fieldPositionY == 1200000:
-                pass
-            i.genRecord(self.recordIndex%self.maxRecordSize)
-            tmp = i.blockSectionIndex
-            tmp.append(i.block.size)
-            for j in range(0,len(tmp)-1):
-                self.record = i.block[tmp[j]:tmp[j+1]]
+            self.genTextBlock(i)
         self.clipBlock()
+        self.endRecord()
+
+    def validateRecord(self, record = None):
+        '''
+        validateRecord(record = None)
         
-        #The final Field End is changed to a Chip End
-        self._record[self._recordIndex-2:self._recordIndex] = self.dec2bin(self.cChipEnd)
+        Parses a binary text record and checks its structure
         
-        #Adds a record end
-        self.record = self.dec2bin(self.cRecordEnd)
+        Parameters
+        ----------
+        record : numpy.ndarray of type numpy.uint8 or None
+            The binary text records, as generated by genRecord
+            None    :   Use the record of this object
+            
+        Returns
+        -------
+        count : list of 4 integers
+            [numTextRecord, numTextBlock, numRect, numTrap] found in the
+            record
         
-        #Update the number of data for the last text block
-        self._record[self.aNumData] = self.dec2bin(self.numData)
+        Description
+        -----------
+        Each 4096 byte record is parsed from its number of data and chain
+        data.  A ValueError is raised when
+            1)  A record does not start with the 'TX' identifier
+            2)  A chain data is out of range or overflows the record
+            3)  A section does not end with a field end, chip end or record
+                end, or an opcode or shape crosses the end of a section
+            4)  A record does not end with a record end, has a section after
+                its record end, or has data beyond its number of data
+            5)  The last text block does not end with a chip end
+        Shapes are counted from the opcodes, the first word of a shape is
+        always smaller than 0xFF00.
+        '''
+        if record is None:
+            record = self.record
+        record = np.asarray(record,dtype=np.uint8)
+        if record.size == 0 or record.size%self.maxRecordSize:
+            raise ValueError('v3_TX.validateRecord() : The record size must be a multiple of ' + str(self.maxRecordSize))
+        word = record.view('<u2').reshape(-1,self.maxRecordSize/2)
+        
+        #Number of parameter words of each opcode
+        P = v3_Pat()
+        B = v3_TXB()
+        nParameter = {B.cFieldPosition : (B.sFieldPosition-2)/2,
+                      P.cPositionSet : (P.sPositionSet-2)/2,
+                      P.cShotRank : (P.sShotRank-2)/2,
+                      P.cPatternCompactionMode8 : (P.sPatternCompactionMode8-2)/2}
+        nShape = {}
+        for i in [P.cRectXS, P.cRectXM, P.cRectYS, P.cRectYM]:
+            nShape[i] = (P.dRectSM/2, 1, 0)
+        for i in [P.cRectXL, P.cRectYL]:
+            nShape[i] = (P.dRectL/2, 1, 0)
+        for i in [P.cTrapXS, P.cTrapXM, P.cTrapYS, P.cTrapYM]:
+            nShape[i] = (P.dTrapSM/2, 0, 1)
+        for i in [P.cTrapXL, P.cTrapYL]:
+            nShape[i] = (P.dTrapL/2, 0, 1)
+        cEnd = [B.cFieldEnd, self.cChipEnd, self.cRecordEnd]
+        
+        numTextBlock = 0
+        numRect = 0
+        numTrap = 0
+        chipEnd = False
+        for r in range(word.shape[0]):
+            if record[r*self.maxRecordSize:r*self.maxRecordSize+2].tostring() != self.identifier:
+                raise ValueError('v3_TX.validateRecord() : Record ' + str(r) + ' does not start with the ' + self.identifier + ' identifier')
+            numData = int(word[r,1])
+            index = 2
+            cType = None
+            recordEnd = False
+            for j in range(numData):
+                if recordEnd:
+                    raise ValueError('v3_TX.validateRecord() : Record ' + str(r) + ' has data after its record end')
+                chainData = int(word[r,index])
+                if chainData < 1 or chainData > 2045:
+                    raise ValueError('v3_TX.validateRecord() : Record ' + str(r) + ' has a chain data out of range')
+                if index + 1 + chainData > word.shape[1]:
+                    raise ValueError('v3_TX.validateRecord() : Record ' + str(r) + ' overflows')
+                section = word[r,index+1:index+1+chainData].tolist()
+                index += 1 + chainData
+                if not section[-1] in cEnd:
+                    raise ValueError('v3_TX.validateRecord() : Section ' + str(j) + ' of record ' + str(r) + ' does not end with an end code')
+                k = 0
+                while k < chainData - 1:
+                    if chipEnd:
+                        raise ValueError('v3_TX.validateRecord() : Record ' + str(r) + ' has data after the chip end')
+                    if section[k] in nParameter:
+                        k += 1 + nParameter[section[k]]
+                        cType = None
+                    elif section[k] in nShape:
+                        cType = section[k]
+                        k += 1
+                    elif section[k] < 0xFF00 and not cType is None:
+                        k += nShape[cType][0]
+                        numRect += nShape[cType][1]
+                        numTrap += nShape[cType][2]
+                    else:
+                        raise ValueError('v3_TX.validateRecord() : Record ' + str(r) + ' has an unexpected word ' + hex(section[k]))
+                if k != chainData - 1:
+                    raise ValueError('v3_TX.validateRecord() : Section ' + str(j) + ' of record ' + str(r) + ' does not end between opcodes')
+                if section[-1] == self.cRecordEnd:
+                    recordEnd = True
+                else:
+                    if chipEnd:
+                        raise ValueError('v3_TX.validateRecord() : Record ' + str(r) + ' has a text block after the chip end')
+                    numTextBlock += 1
+                    chipEnd = section[-1] == self.cChipEnd
+                    cType = None
+            if not recordEnd:
+                raise ValueError('v3_TX.validateRecord() : Record ' + str(r) + ' does not end with a record end')
+            if np.any(word[r,index:]):
+                raise ValueError('v3_TX.validateRecord() : Record ' + str(r) + ' has data beyond its number of data')
+        if not chipEnd:
+            raise ValueError('v3_TX.validateRecord() : The text record does not end with a chip end')
+        return [word.shape[0], numTextBlock, numRect, numTrap]
         
 def test(): 
     
@@ -16,6 +16,7 @@ class v3_TXB(v3):
     The following methods are supported by the v3_TXB class:
        addPattern:          Adds a pattern to the text block
        genRecord:           Generates the binary record
+       clearBlock:          Releases the binary record
     
     This class is constructed such that:
         1)  Contains a single field
@@ -37,6 +38,7 @@ class v3_TXB(v3):
         self._fieldPositionY = 0
         self._positionSetX = 0
         self._positionSetY = 0
+        self._exactPacking = False
         
         self._cFieldEnd = 0xFFF4                #0xFFF4
         self._cRecordEnd = 0xFFF2               #0xFFF2
@@ -272,6 +274,32 @@ class v3_TXB(v3):
         '''
         self._block = np.delete(self._block,np.s_[self._blockIndex::],0)
 
+    def clearBlock(self):
+        '''
+        clearBlock()
+        
+        Releases the binary data of this text block and of its patterns
+        after it has been added to a record
+        '''
+        self._block = np.zeros(self._blockBuffer,dtype=np.uint8)
+        self._blockIndex = 0
+        self._blockSectionIndex = [0]
+        for i in self.pattern:
+            i.clearBlock()
+
+    @property
+    def exactPacking(self):
+        '''
+        exactPacking : boolean
+            Fill each record up to the actual length of the next opcode, see
+            v3_Pat.exactPacking
+        '''
+        return self._exactPacking
+        
+    @exactPacking.setter
+    def exactPacking(self, val):
+        self._exactPacking = bool(val)
+
     def blockFracture(self, offset, sByte):
         '''
         blockFracture(offset,cType)
@@ -281,6 +309,7 @@ class v3_TXB(v3):
         offset : integer from 0 to 4096
         
         sByte : integer
+            The number of bytes of the next item including a cRecordEnd
         
         Returns
         -------
@@ -290,7 +319,7 @@ class v3_TXB(v3):
         if self.maxRecordSize < offset + sByte:
             self.block = self.dec2bin(self.cRecordEnd)
             self.blockSectionIndex = self.blockIndex
-            offset = 0
+            offset = 6     #TX identifier, number of data and chain data
         return offset
 
     @property
@@ -387,11 +416,18 @@ class v3_TXB(v3):
         
         #Patterns
         for i in self.pattern:
+            i.exactPacking = self.exactPacking
             offset = i.genRecord(offset)
             for j in range(1,len(i.blockSectionIndex)):
                 self.blockSectionIndex = i.blockSectionIndex[j] + self.blockIndex
             self.block = i.block
         
+        #The field end is followed by the chain data and record end that close
+        #the record, without exactPacking the offset may be 2 bytes short
+        if self.exactPacking:
+            offset = self.blockFracture(offset,6)
+        else:
+            offset = self.blockFracture(offset,8)
         self.block = self.dec2bin(self.cFieldEnd)
         self.clipBlock()
         